@@ -0,0 +1,355 @@
+import abc
+import asyncio
+import json
+import logging
+import time
+from urllib.parse import urlparse
+
+log = logging.getLogger(__name__)
+
+# Canal des notifications de changement (une par commit)
+CHANNEL = "gs:changes"
+# Attente avant de se réabonner après une coupure (doublée à chaque échec, en secondes)
+RECONNECT_DELAY = 0.5
+RECONNECT_MAX_DELAY = 30.0
+# Durée maximale d'une transaction sur la connexion de commandes (connexion comprise, en secondes)
+COMMAND_TIMEOUT = 2.0
+
+
+class BackendError(Exception):
+    """Backend partagé injoignable ou réponse inattendue"""
+
+
+def encode_notification(key, version, origin):
+    return json.dumps({'key': list(key), 'version': version, 'origin': origin})
+
+
+def decode_notification(raw):
+    message = json.loads(raw)
+    return tuple(message['key']), message['version'], message['origin']
+
+
+class StateBackend(abc.ABC):
+    """État des sessions GS partagé entre processus
+
+    Chaque session a une version : `commit` n'écrit que si la version attendue est toujours la version
+    courante (verrou optimiste) et publie alors une notification (clé, version, origine) à tous les
+    abonnés. Les baux désignent le processus propriétaire du tableau de chaque session.
+    """
+
+    @abc.abstractmethod
+    async def start(self, on_change, on_reconnect=None):
+        """Démarre l'abonnement : `on_change(clé, version, origine)` est appelé à chaque commit
+
+        `on_reconnect()` est appelé quand l'abonnement est rétabli après une coupure : des notifications
+        ont pu être perdues entre-temps.
+        """
+
+    @abc.abstractmethod
+    async def load(self, key):
+        """Retourne (version, état encodé) ; (0, None) si la session n'existe pas encore"""
+
+    @abc.abstractmethod
+    async def commit(self, key, expected_version, state, origin):
+        """Écrit l'état si la version est toujours `expected_version` ; retourne la nouvelle version ou None"""
+
+    @abc.abstractmethod
+    async def acquire_lease(self, key, owner, ttl):
+        """Prend ou prolonge le bail de `owner` sur la session pour `ttl` secondes ; False s'il est à un autre"""
+
+    async def close(self):
+        pass
+
+
+class MemoryBackend(StateBackend):
+    """Backend en mémoire : partagé entre les bots d'un même processus (tests, instance unique)"""
+
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._states = {}  # Format: {clé: (version, état encodé)}
+        self._leases = {}  # Format: {clé: (propriétaire, expiration)}
+        self._subscribers = []
+
+    async def start(self, on_change, on_reconnect=None):
+        # Pas de connexion, donc jamais de coupure
+        self._subscribers.append(on_change)
+
+    async def load(self, key):
+        return self._states.get(key, (0, None))
+
+    async def commit(self, key, expected_version, state, origin):
+        version, _ = self._states.get(key, (0, None))
+        if version != expected_version:
+            return None
+        self._states[key] = (version + 1, state)
+        loop = asyncio.get_running_loop()
+        for on_change in self._subscribers:
+            # Livrée après le commit, comme une notification reçue du réseau
+            loop.call_soon(on_change, key, version + 1, origin)
+        return version + 1
+
+    async def acquire_lease(self, key, owner, ttl):
+        now = self._clock()
+        holder, expires = self._leases.get(key, (None, 0))
+        if holder not in (None, owner) and expires > now:
+            return False
+        self._leases[key] = (owner, now + ttl)
+        return True
+
+
+class RESPConnection:
+    """Connexion minimale au protocole Redis (RESP2) sur les flux asyncio"""
+
+    def __init__(self, reader, writer):
+        self._reader = reader
+        self._writer = writer
+
+    @classmethod
+    async def open(cls, host, port, db=0, password=None):
+        reader, writer = await asyncio.open_connection(host, port)
+        connection = cls(reader, writer)
+        if password:
+            await connection.execute('AUTH', password)
+        if db:
+            await connection.execute('SELECT', db)
+        return connection
+
+    def send(self, *args):
+        parts = [f"*{len(args)}\r\n".encode()]
+        for arg in args:
+            data = arg if isinstance(arg, bytes) else str(arg).encode()
+            parts.append(b"$%d\r\n%s\r\n" % (len(data), data))
+        self._writer.write(b"".join(parts))
+
+    async def read(self):
+        line = await self._reader.readline()
+        if not line:
+            raise BackendError("Connexion au backend fermée")
+        kind, payload = line[:1], line[1:-2]
+        if kind == b'+':
+            return payload.decode()
+        if kind == b'-':
+            raise BackendError(payload.decode())
+        if kind == b':':
+            return int(payload)
+        if kind == b'$':
+            length = int(payload)
+            if length < 0:
+                return None
+            data = await self._reader.readexactly(length + 2)
+            return data[:-2]
+        if kind == b'*':
+            length = int(payload)
+            if length < 0:
+                return None
+            return [await self.read() for _ in range(length)]
+        raise BackendError(f"Réponse RESP inattendue : {line!r}")
+
+    async def execute(self, *args):
+        self.send(*args)
+        await self._writer.drain()
+        return await self.read()
+
+    def abort(self):
+        """Ferme la connexion sans attendre (réponses en attente perdues)"""
+        self._writer.close()
+
+    async def close(self):
+        self._writer.close()
+        try:
+            await self._writer.wait_closed()
+        except (ConnectionError, OSError):
+            pass
+
+
+class RedisBackend(StateBackend):
+    """Backend Redis (ou compatible RESP) : hash par session, WATCH/MULTI/EXEC pour le verrou optimiste
+
+    Clés : `gs:state:{guild}:{salon}` (champs version et state) et `gs:lease:{guild}:{salon}`.
+    Une connexion sert les commandes (une transaction à la fois), une autre est abonnée à CHANNEL.
+    """
+
+    def __init__(self, url):
+        parsed = urlparse(url)
+        self.host = parsed.hostname or 'localhost'
+        self.port = parsed.port or 6379
+        self.db = int(parsed.path.lstrip('/') or 0)
+        self.password = parsed.password
+        self._commands = None
+        self._lock = asyncio.Lock()
+        self._listener = None
+
+    async def _connection(self):
+        if self._commands is None:
+            self._commands = await RESPConnection.open(self.host, self.port, self.db, self.password)
+        return self._commands
+
+    async def _call(self, transaction):
+        """Exécute `transaction(connexion)` seul sur la connexion de commandes, en COMMAND_TIMEOUT au plus
+
+        BackendError si le backend est injoignable ou trop lent.
+        """
+        async def run():
+            return await transaction(await self._connection())
+
+        async with self._lock:
+            try:
+                return await asyncio.wait_for(run(), COMMAND_TIMEOUT)
+            except asyncio.TimeoutError as e:
+                # Des réponses arriveront encore sur ce flux : il ne correspond plus aux commandes envoyées
+                self._drop_connection()
+                raise BackendError("Pas de réponse du backend en %.1f s" % COMMAND_TIMEOUT) from e
+            except asyncio.CancelledError:
+                self._drop_connection()
+                raise
+            except (ConnectionError, OSError, asyncio.IncompleteReadError, BackendError) as e:
+                # Connexion dans un état inconnu : elle sera rouverte au prochain appel
+                self._drop_connection()
+                raise BackendError(str(e)) from e
+
+    def _drop_connection(self):
+        if self._commands is not None:
+            self._commands.abort()
+            self._commands = None
+
+    @staticmethod
+    def _state_key(key):
+        return "gs:state:%d:%d" % key
+
+    @staticmethod
+    def _lease_key(key):
+        return "gs:lease:%d:%d" % key
+
+    async def start(self, on_change, on_reconnect=None):
+        # Le premier abonnement doit réussir : un backend injoignable au démarrage est une erreur de configuration
+        subscriber = await self._subscribe()
+        self._listener = asyncio.create_task(self._listen(subscriber, on_change, on_reconnect))
+
+    async def _subscribe(self):
+        subscriber = await RESPConnection.open(self.host, self.port, self.db, self.password)
+        try:
+            await subscriber.execute('SUBSCRIBE', CHANNEL)
+        except BaseException:
+            await subscriber.close()
+            raise
+        return subscriber
+
+    async def _listen(self, subscriber, on_change, on_reconnect):
+        while True:
+            try:
+                while True:
+                    message = await subscriber.read()
+                    if isinstance(message, list) and len(message) == 3 and message[0] == b'message':
+                        try:
+                            on_change(*decode_notification(message[2]))
+                        except Exception:
+                            log.exception("Notification de changement invalide : %r", message[2])
+            except (BackendError, ConnectionError, OSError, asyncio.IncompleteReadError) as e:
+                log.warning("Abonnement aux changements GS interrompu : %s", e)
+            finally:
+                await subscriber.close()
+            subscriber = await self._resubscribe()
+            log.info("Abonnement aux changements GS rétabli")
+            if on_reconnect is not None:
+                on_reconnect()
+
+    async def _resubscribe(self):
+        """Se réabonne à CHANNEL en espaçant les tentatives (RECONNECT_DELAY, doublé jusqu'à RECONNECT_MAX_DELAY)"""
+        delay = RECONNECT_DELAY
+        while True:
+            await asyncio.sleep(delay)
+            try:
+                return await self._subscribe()
+            except (BackendError, ConnectionError, OSError, asyncio.IncompleteReadError) as e:
+                delay = min(delay * 2, RECONNECT_MAX_DELAY)
+                log.warning("Réabonnement impossible (%s), nouvel essai dans %.1f s", e, delay)
+
+    async def load(self, key):
+        async def transaction(connection):
+            version, state = await connection.execute('HMGET', self._state_key(key), 'version', 'state')
+            return int(version or 0), state.decode() if state is not None else None
+        return await self._call(transaction)
+
+    async def commit(self, key, expected_version, state, origin):
+        state_key = self._state_key(key)
+
+        async def transaction(connection):
+            await connection.execute('WATCH', state_key)
+            version = int(await connection.execute('HGET', state_key, 'version') or 0)
+            if version != expected_version:
+                await connection.execute('UNWATCH')
+                return None
+            # Les commandes de la transaction sont envoyées d'un bloc
+            connection.send('MULTI')
+            connection.send('HSET', state_key, 'version', version + 1, 'state', state)
+            connection.send('PUBLISH', CHANNEL, encode_notification(key, version + 1, origin))
+            connection.send('EXEC')
+            replies = [await connection.read() for _ in range(4)]
+            # EXEC retourne nil si la clé a été modifiée depuis le WATCH
+            return version + 1 if replies[-1] is not None else None
+        return await self._call(transaction)
+
+    async def acquire_lease(self, key, owner, ttl):
+        lease_key = self._lease_key(key)
+
+        async def transaction(connection):
+            await connection.execute('WATCH', lease_key)
+            holder = await connection.execute('GET', lease_key)
+            if holder is not None and holder.decode() != owner:
+                await connection.execute('UNWATCH')
+                return False
+            connection.send('MULTI')
+            connection.send('SET', lease_key, owner, 'PX', int(ttl * 1000))
+            connection.send('EXEC')
+            replies = [await connection.read() for _ in range(3)]
+            return replies[-1] is not None
+        return await self._call(transaction)
+
+    async def close(self):
+        if self._listener is not None:
+            self._listener.cancel()
+        if self._commands is not None:
+            await self._commands.close()
+
+
+def create_backend(url):
+    """Backend désigné par STATE_BACKEND : 'memory', 'redis://hôte:port/db' ou '' (aucun)"""
+    if not url:
+        return None
+    if url == 'memory':
+        return MemoryBackend()
+    if url.startswith(('redis://', 'resp://')):
+        return RedisBackend(url)
+    raise ValueError(f"STATE_BACKEND inconnu : {url}")
+
+
+class BoardLeases:
+    """Propriété des tableaux : seul le processus qui détient le bail d'une session édite son tableau
+
+    Le bail est prolongé quand il a consommé la moitié de sa durée ; un processus arrêté le perd à
+    expiration et un autre le reprend à la prochaine modification. Sans backend, tout est local.
+    """
+
+    def __init__(self, backend, owner, ttl: float = 30.0, clock=time.monotonic):
+        self._backend = backend
+        self.owner = owner
+        self.ttl = ttl
+        self._clock = clock
+        self._held = {}  # Format: {clé: instant de renouvellement}
+
+    async def owns(self, key):
+        if self._backend is None:
+            return True
+        now = self._clock()
+        if self._held.get(key, 0) > now:
+            return True
+        try:
+            acquired = await self._backend.acquire_lease(key, self.owner, self.ttl)
+        except BackendError:
+            log.warning("Bail du tableau %s indisponible", key)
+            acquired = False
+        if acquired:
+            self._held[key] = now + self.ttl / 2
+        else:
+            self._held.pop(key, None)
+        return acquired
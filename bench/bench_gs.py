@@ -0,0 +1,249 @@
+"""Benchmarks hors ligne des commandes GS et du rendu du tableau.
+
+Exemple :
+    python bench/bench_gs.py --roster 26 200 2000 --burst 1 26 --output bench.json
+
+Chaque résultat est un objet JSON (roster, burst, mesure, latences en ms, appels REST par commande)
+pour pouvoir comparer deux exécutions avant/après un changement.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+_tmpdir = tempfile.mkdtemp(prefix="gs-bench-")
+os.environ.setdefault('GS_DB_PATH', os.path.join(_tmpdir, 'bench.db'))
+os.environ.setdefault('TREE_HASH_PATH', os.path.join(_tmpdir, 'tree_hash'))
+# Les rosters du banc dépassent la limite d'une vraie GS
+os.environ.setdefault('MAX_PLAYERS', '100000')
+
+import bot as gs  # noqa: E402
+from fakes import FakeChannel, FakeGuild, FakeInteraction, FakeMember, RestCounter  # noqa: E402
+from render import BoardRenderCache  # noqa: E402
+
+OFFICER_ID = 1
+PLAYER_ID_BASE = 1_000_000
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def summarize(samples):
+    return {
+        'count': len(samples),
+        'mean_ms': statistics.fmean(samples) * 1000,
+        'p50_ms': percentile(samples, 0.50) * 1000,
+        'p95_ms': percentile(samples, 0.95) * 1000,
+        'max_ms': max(samples) * 1000,
+    }
+
+
+class Scenario:
+    """Une session GS isolée (salon dédié) avec un roster de taille donnée"""
+
+    _next_channel_id = 1
+
+    def __init__(self, roster_size):
+        Scenario._next_channel_id += 1
+        self.rest = RestCounter()
+        self.guild = FakeGuild(1)
+        self.channel = FakeChannel(Scenario._next_channel_id, self.guild, self.rest)
+        self.officer = FakeMember(OFFICER_ID, roles=[gs.OFFICER_ROLE_ID])
+        self.players = [FakeMember(PLAYER_ID_BASE + i) for i in range(roster_size)]
+
+    async def setup(self):
+        session = gs.bot.sessions.get_or_create(self.guild.id, self.channel.id)
+        roster = [(p.id, p.display_name, p.mention) for p in self.players]
+        await session.apply(('init', roster))
+        await gs.update_gs_message(session, self.channel, create=True)
+        self.session = session
+        # Laisser la file sortante épingler le tableau avant de compter les appels
+        await asyncio.sleep(0.05)
+        self.rest.reset()
+
+    def interaction(self, user):
+        # Les réponses passent par les callbacks de la TraceConfig du bot, comme avec l'adaptateur webhook
+        return FakeInteraction(user, self.channel, gs.bot.http.http_trace.on_request_end)
+
+
+async def timed(callback, *args):
+    start = time.perf_counter()
+    await callback(*args)
+    return time.perf_counter() - start
+
+
+async def bench_render(scenario, repeat):
+    session = scenario.session
+    cold, warm, one_change = [], [], []
+    for i in range(repeat):
+        session.render_cache = BoardRenderCache()
+        session.render_cache.reset(session.state)
+        start = time.perf_counter()
+        gs.render_gs_board(session)
+        cold.append(time.perf_counter() - start)
+
+        start = time.perf_counter()
+        gs.render_gs_board(session)
+        warm.append(time.perf_counter() - start)
+
+        player = scenario.players[i % len(scenario.players)]
+        await session.apply(('set', player.id, 'defense', i % 20 + 1))
+        start = time.perf_counter()
+        gs.render_gs_board(session)
+        one_change.append(time.perf_counter() - start)
+    return {'render_cold': cold, 'render_warm': warm, 'render_one_change': one_change}
+
+
+async def bench_player_command(scenario, name, burst, rounds, window):
+    """Rafales de `burst` joueurs distincts lançant la même commande en même temps"""
+    callback = gs.bot.tree.get_command(name).callback
+    latencies = []
+    scenario.rest.reset()
+    for r in range(rounds):
+        players = scenario.players[:burst]
+        calls = [timed(callback, scenario.interaction(p), (r + i) % 20 + 1) for i, p in enumerate(players)]
+        latencies.extend(await asyncio.gather(*calls))
+        # Laisser le planificateur publier l'édition regroupée
+        await asyncio.sleep(window * 2)
+    return latencies, dict(scenario.rest.calls), burst * rounds
+
+
+async def bench_board_select(scenario, burst, rounds, window):
+    """Rafales de soumissions via les menus du tableau (réponse = édition de la première page)"""
+    board = scenario.channel.messages[scenario.session.state.message_id]
+    latencies = []
+    scenario.rest.reset()
+    for r in range(rounds):
+        calls = []
+        for i, player in enumerate(scenario.players[:burst]):
+            interaction = scenario.interaction(player)
+            interaction.message = board
+            calls.append(timed(gs.bot.submit_from_board, interaction, 'defense', (r + i) % 20 + 1))
+        latencies.extend(await asyncio.gather(*calls))
+        await asyncio.sleep(window * 2)
+    return latencies, dict(scenario.rest.calls), burst * rounds
+
+
+async def bench_board_after_ack(scenario, rounds, window, timeout=5.0):
+    """Délai entre l'arrivée d'une interaction et l'édition du tableau qu'elle déclenche
+
+    L'interaction passe par `on_interaction` : la file sortante retient le tableau jusqu'à ce que
+    la réponse soit vue par la TraceConfig, puis doit l'envoyer sans attendre ACK_DEADLINE.
+    """
+    callback = gs.bot.tree.get_command('def').callback
+    latencies = []
+    scenario.rest.reset()
+    for r in range(rounds):
+        player = scenario.players[r % len(scenario.players)]
+        interaction = scenario.interaction(player)
+        # Une cible différente de l'actuelle : le tableau change à chaque tour
+        target = scenario.session.state.get(player.id).defense % 20 + 1
+        edits = scenario.rest.calls['message.edit']
+        start = time.perf_counter()
+        await gs.bot.on_interaction(interaction)
+        await callback(interaction, target)
+        while scenario.rest.calls['message.edit'] == edits and time.perf_counter() - start < timeout:
+            await asyncio.sleep(window / 10)
+        latencies.append(time.perf_counter() - start)
+    return latencies, dict(scenario.rest.calls), rounds
+
+
+async def bench_officer_command(scenario, name, rounds, window, *args):
+    callback = gs.bot.tree.get_command(name).callback
+    latencies = []
+    scenario.rest.reset()
+    for _ in range(rounds):
+        latencies.append(await timed(callback, scenario.interaction(scenario.officer), *args))
+    await asyncio.sleep(window * 2)
+    return latencies, dict(scenario.rest.calls), rounds
+
+
+async def run(args):
+    await asyncio.to_thread(gs.bot.store.load)
+    gs.bot.store.start()
+    gs.bot.outbox.start()
+    gs.bot.board_scheduler.interval = args.window
+    star = gs.app_commands.Choice(name="3 étoiles", value=3)
+
+    results = []
+    for roster_size in args.roster:
+        for burst in args.burst:
+            burst = min(burst, roster_size)
+            scenario = Scenario(roster_size)
+            await scenario.setup()
+            base = {'roster': roster_size, 'burst': burst}
+
+            for measure, samples in (await bench_render(scenario, args.repeat)).items():
+                results.append({**base, 'measure': measure, **summarize(samples)})
+
+            for name in ('def', 'test', 'atq'):
+                latencies, calls, count = await bench_player_command(scenario, name, burst, args.repeat, args.window)
+                results.append({
+                    **base, 'measure': f'/{name}', **summarize(latencies),
+                    'rest_calls_per_command': sum(calls.values()) / count, 'rest_calls': calls
+                })
+
+            latencies, calls, count = await bench_board_select(scenario, burst, args.repeat, args.window)
+            results.append({
+                **base, 'measure': 'board_select', **summarize(latencies),
+                'rest_calls_per_command': sum(calls.values()) / count, 'rest_calls': calls
+            })
+
+            latencies, calls, count = await bench_board_after_ack(scenario, args.repeat, args.window)
+            results.append({
+                **base, 'measure': 'board_after_ack', **summarize(latencies),
+                'rest_calls_per_command': sum(calls.values()) / count, 'rest_calls': calls
+            })
+
+            officer_commands = (
+                ('check_actions', ()),
+                ('gg', ()),
+                ('add_star', (scenario.players[0], star)),
+                ('reset_all_actions', ()),
+            )
+            for name, extra in officer_commands:
+                latencies, calls, count = await bench_officer_command(scenario, name, args.repeat, args.window, *extra)
+                results.append({
+                    **base, 'measure': f'/{name}', **summarize(latencies),
+                    'rest_calls_per_command': sum(calls.values()) / count, 'rest_calls': calls
+                })
+    await gs.bot.store.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--roster', type=int, nargs='+', default=[26, 100, 1000], help="Tailles de roster à tester")
+    parser.add_argument('--burst', type=int, nargs='+', default=[1, 26], help="Nombre de soumissions simultanées")
+    parser.add_argument('--repeat', type=int, default=20, help="Répétitions par mesure")
+    parser.add_argument('--window', type=float, default=0.01, help="Fenêtre du planificateur de tableau (s)")
+    parser.add_argument('--output', help="Fichier JSON de sortie (sinon stdout)")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+
+    payload = json.dumps({'python': sys.version.split()[0], 'results': results}, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(payload)
+    else:
+        print(payload)
+
+    for r in results:
+        rest = f" rest/cmd={r['rest_calls_per_command']:.2f}" if 'rest_calls_per_command' in r else ""
+        print(f"roster={r['roster']:>5} burst={r['burst']:>3} {r['measure']:<18} "
+              f"p50={r['p50_ms']:.3f}ms p95={r['p95_ms']:.3f}ms{rest}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
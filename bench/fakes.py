@@ -0,0 +1,166 @@
+"""Objets Discord factices pour les benchmarks : aucune requête réseau, chaque appel REST est compté"""
+import itertools
+import types
+from collections import Counter
+
+import discord
+
+_ids = itertools.count(10_000)
+
+API_URL = "https://discord.com/api/v10"
+APPLICATION_ID = 1
+
+
+async def trace_request(hooks, url, status=200):
+    """Signale une requête simulée aux callbacks aiohttp on_request_end (TraceConfig du bot)"""
+    params = types.SimpleNamespace(url=url, response=types.SimpleNamespace(status=status, headers={}))
+    for hook in hooks:
+        await hook(None, None, params)
+
+
+class RestCounter:
+    """Compte les appels REST simulés, par route"""
+
+    def __init__(self):
+        self.calls = Counter()
+
+    def hit(self, route):
+        self.calls[route] += 1
+
+    @property
+    def total(self):
+        return sum(self.calls.values())
+
+    def reset(self):
+        self.calls.clear()
+
+
+class _NotFoundResponse:
+    status = 404
+    reason = "Not Found"
+
+
+class FakeRole:
+    def __init__(self, role_id):
+        self.id = role_id
+
+
+class FakeGuild:
+    def __init__(self, guild_id):
+        self.id = guild_id
+
+
+class FakeMember:
+    def __init__(self, user_id, roles=()):
+        self.id = user_id
+        self.name = f"joueur{user_id}"
+        self.display_name = f"Joueur {user_id}"
+        self.mention = f"<@{user_id}>"
+        self.bot = False
+        self.roles = [FakeRole(role_id) for role_id in roles]
+
+
+class FakeMessage:
+    def __init__(self, channel, **fields):
+        self.id = next(_ids)
+        self.channel = channel
+        self.fields = fields
+        self.pinned = False
+
+    async def edit(self, **fields):
+        self.channel.rest.hit('message.edit')
+        if self.id not in self.channel.messages:
+            raise discord.NotFound(_NotFoundResponse(), "Unknown Message")
+        self.fields.update(fields)
+        return self
+
+    async def delete(self):
+        self.channel.rest.hit('message.delete')
+        if self.channel.messages.pop(self.id, None) is None:
+            raise discord.NotFound(_NotFoundResponse(), "Unknown Message")
+
+    async def pin(self, reason=None):
+        self.channel.rest.hit('message.pin')
+        self.pinned = True
+
+
+class FakeChannel:
+    def __init__(self, channel_id, guild, rest):
+        self.id = channel_id
+        self.guild = guild
+        self.rest = rest
+        self.messages = {}
+
+    async def send(self, content=None, **fields):
+        self.rest.hit('channel.send')
+        message = FakeMessage(self, content=content, **fields)
+        self.messages[message.id] = message
+        return message
+
+    def get_partial_message(self, message_id):
+        message = self.messages.get(message_id)
+        if message is None:
+            message = FakeMessage(self)
+            message.id = message_id
+        return message
+
+    async def fetch_message(self, message_id):
+        self.rest.hit('channel.fetch_message')
+        try:
+            return self.messages[message_id]
+        except KeyError:
+            raise discord.NotFound(_NotFoundResponse(), "Unknown Message") from None
+
+
+class FakeResponse:
+    def __init__(self, rest, interaction_id, trace=()):
+        self.rest = rest
+        self.trace = trace
+        self._url = f"{API_URL}/interactions/{interaction_id}/token/callback"
+        self._done = False
+        self.sent = []
+
+    def is_done(self):
+        return self._done
+
+    async def _callback(self, route):
+        # Comme discord.py, la réponse passe par l'adaptateur webhook : seule la TraceConfig la voit
+        self.rest.hit(route)
+        self._done = True
+        await trace_request(self.trace, self._url, 204)
+
+    async def send_message(self, content=None, **fields):
+        self.sent.append((content, fields))
+        await self._callback('interaction.respond')
+
+    async def defer(self, **fields):
+        await self._callback('interaction.defer')
+
+    async def edit_message(self, **fields):
+        await self._callback('interaction.edit_message')
+
+
+class FakeFollowup:
+    def __init__(self, rest, trace=()):
+        self.rest = rest
+        self.trace = trace
+
+    async def send(self, content=None, **fields):
+        self.rest.hit('interaction.followup')
+        await trace_request(self.trace, f"{API_URL}/webhooks/{APPLICATION_ID}/token")
+
+
+class FakeInteraction:
+    command = None
+    message = None
+
+    def __init__(self, user, channel, trace=()):
+        self.id = next(_ids)
+        self.user = user
+        self.channel = channel
+        self.channel_id = channel.id
+        self.guild = channel.guild
+        self.guild_id = channel.guild.id
+        # `trace` : callbacks on_request_end à prévenir des requêtes de réponse et de suivi
+        self.response = FakeResponse(channel.rest, self.id, trace)
+        self.followup = FakeFollowup(channel.rest, trace)
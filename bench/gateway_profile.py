@@ -0,0 +1,66 @@
+"""Compare les profils gateway 'full' et 'lean' : temps jusqu'à on_ready et empreinte mémoire.
+
+Nécessite un vrai DISCORD_TOKEN (dans l'environnement ou le .env) : le bot est lancé une fois par
+profil et par répétition, écrit son rapport de démarrage au premier on_ready puis s'arrête.
+
+Exemple :
+    python bench/gateway_profile.py --repeat 3 --output gateway.json
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PROFILES = ('full', 'lean')
+
+
+def run_bot(profile, workdir, timeout):
+    report_path = os.path.join(workdir, f'ready-{profile}.json')
+    env = dict(
+        os.environ,
+        GATEWAY_PROFILE=profile,
+        READY_REPORT_PATH=report_path,
+        EXIT_ON_READY='1',
+        # Base jetable : on mesure le démarrage, pas la restauration des GS en cours
+        GS_DB_PATH=os.path.join(workdir, f'{profile}.db'),
+        METRICS_PATH='',
+    )
+    subprocess.run([sys.executable, 'bot.py'], cwd=ROOT, env=env, timeout=timeout, check=True, stdout=subprocess.DEVNULL)
+    with open(report_path) as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=3, help="Démarrages par profil")
+    parser.add_argument('--timeout', type=float, default=300, help="Délai maximal d'un démarrage (s)")
+    parser.add_argument('--output', help="Fichier JSON de sortie (sinon stdout)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="gs-gateway-")
+    reports = {profile: [] for profile in PROFILES}
+    for _ in range(args.repeat):
+        # Alterner les profils pour ne pas favoriser l'un d'eux (cache réseau, charge de Discord)
+        for profile in PROFILES:
+            reports[profile].append(run_bot(profile, workdir, args.timeout))
+
+    payload = json.dumps({'python': sys.version.split()[0], 'reports': reports}, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(payload)
+    else:
+        print(payload)
+
+    for profile, runs in reports.items():
+        ready = statistics.median(run['phases']['cache prêt'] for run in runs)
+        rss = statistics.median(run.get('max_rss_mb', 0) for run in runs)
+        members = statistics.median(run['cached_members'] for run in runs)
+        print(f"{profile:<5} prêt={ready:.2f}s rss={rss:.1f}Mo membres en cache={members:.0f}", file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+"""Rejeu d'un enregistrement de mutations GS (EVENT_LOG_PATH) sur le moteur, sans Discord.
+
+Exemple :
+    python bench/replay_gs.py gs_events.jsonl --speed 10 --save attendu.json
+    python bench/replay_gs.py gs_events.jsonl --speed 0 --expect attendu.json
+
+--speed N rejoue N fois plus vite que l'enregistrement (0 : sans attente). Le transport factice compte
+les éditions du tableau qu'aurait faites le planificateur (au plus une par salon et par fenêtre).
+--save / --expect enregistrent puis vérifient l'état final de chaque session (tests de non-régression).
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from engine import GSEngine  # noqa: E402
+from eventlog import read_events  # noqa: E402
+from models import encode_state  # noqa: E402
+
+
+class FakeTransport:
+    """Publication factice du tableau : regroupe les changements comme BoardScheduler, en temps rejoué"""
+
+    def __init__(self, window):
+        self.window = window
+        self._due = {}  # Format: {clé de session: instant de la prochaine édition prévue}
+        self.edits = 0
+        self.coalesced = 0  # Lots dont les changements rejoignent une édition déjà prévue
+
+    def publish(self, key, at, deltas):
+        if not deltas:
+            return
+        due = self._due.get(key)
+        if due is not None and at < due:
+            self.coalesced += 1
+            return
+        self._due[key] = at if due is None else max(at, due + self.window)
+        self.edits += 1
+
+
+def state_digest(state):
+    return hashlib.sha1(encode_state(state).encode()).hexdigest()
+
+
+def replay(events, speed, window, max_players):
+    engines = {}  # Format: {(guild_id, channel_id): GSEngine}
+    transport = FakeTransport(window)
+    counts = {'batches': 0, 'events': 0, 'deltas': 0, 'rejected': 0}
+    engine_time = 0.0
+    started = time.perf_counter()
+    first = events[0][0] if events else 0
+    for at, key, ops in events:
+        if speed > 0:
+            # Respecter les écarts de l'enregistrement, accélérés
+            delay = (at - first) / speed - (time.perf_counter() - started)
+            if delay > 0:
+                time.sleep(delay)
+        engine = engines.get(key)
+        if engine is None:
+            engine = engines[key] = GSEngine(max_players=max_players)
+        start = time.perf_counter()
+        deltas, rejected = engine.apply_events(ops)
+        engine_time += time.perf_counter() - start
+        transport.publish(key, at, deltas)
+        counts['batches'] += 1
+        counts['events'] += len(ops)
+        counts['deltas'] += len(deltas)
+        counts['rejected'] += len(rejected)
+    wall = time.perf_counter() - started
+    return {
+        **counts,
+        'engine_s': engine_time,
+        'events_per_s': counts['events'] / engine_time if engine_time else None,
+        'wall_s': wall,
+        'board_edits': transport.edits,
+        'board_coalesced': transport.coalesced,
+        'sessions': {f"{guild_id}:{channel_id}": state_digest(engine.state) for (guild_id, channel_id), engine in engines.items()},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('log', help="Enregistrement JSONL (EVENT_LOG_PATH)")
+    parser.add_argument('--speed', type=float, default=0, help="Accélération du rejeu (0 : sans attente)")
+    parser.add_argument('--window', type=float, default=2.0, help="Fenêtre du planificateur de tableau (s)")
+    parser.add_argument('--max-players', type=int, default=int(os.getenv('MAX_PLAYERS', '26')), help="Taille maximale du roster")
+    parser.add_argument('--save', help="Écrire l'empreinte de l'état final de chaque session dans ce fichier")
+    parser.add_argument('--expect', help="Comparer l'état final aux empreintes de ce fichier")
+    args = parser.parse_args()
+
+    result = replay(read_events(args.log), args.speed, args.window, args.max_players)
+    print(json.dumps({k: v for k, v in result.items() if k != 'sessions'}, indent=2))
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump(result['sessions'], f, indent=2, sort_keys=True)
+    if args.expect:
+        with open(args.expect) as f:
+            expected = json.load(f)
+        diverged = sorted(key for key in expected.keys() | result['sessions'].keys() if expected.get(key) != result['sessions'].get(key))
+        if diverged:
+            print(f"État final différent pour {len(diverged)} session(s) : {', '.join(diverged)}", file=sys.stderr)
+            sys.exit(1)
+        print(f"État final identique pour {len(expected)} session(s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,182 @@
+"""Serveur RESP minimal pour tester RedisBackend sans Redis.
+
+Exemple :
+    python bench/resp_standin.py --port 6390
+    STATE_BACKEND=redis://localhost:6390 python bot.py
+
+Ne couvre que les commandes utilisées par le backend (GET/SET NX PX, HGET/HMGET/HSET, WATCH/MULTI/EXEC,
+PUBLISH/SUBSCRIBE). Les données restent en mémoire.
+"""
+import argparse
+import asyncio
+import time
+
+
+class RESPStandIn:
+    def __init__(self):
+        self._data = {}  # Format: {clé: str ou dict}
+        self._expires = {}  # Format: {clé: instant d'expiration (time.monotonic())}
+        self._revisions = {}  # Format: {clé: n° de modification}, pour WATCH
+        self._subscribers = {}  # Format: {canal: {StreamWriter}}
+
+    async def start(self, host='127.0.0.1', port=0):
+        self.server = await asyncio.start_server(self._serve, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    # Encodage des réponses
+
+    @staticmethod
+    def _encode(value):
+        if value is None:
+            return b"$-1\r\n"
+        if isinstance(value, int):
+            return b":%d\r\n" % value
+        if isinstance(value, Exception):
+            return b"-ERR %s\r\n" % str(value).encode()
+        if isinstance(value, list):
+            return b"*%d\r\n" % len(value) + b"".join(RESPStandIn._encode(item) for item in value)
+        if isinstance(value, str) and value in ('OK', 'QUEUED', 'PONG'):
+            return b"+%s\r\n" % value.encode()
+        data = value if isinstance(value, bytes) else str(value).encode()
+        return b"$%d\r\n%s\r\n" % (len(data), data)
+
+    @staticmethod
+    async def _read_command(reader):
+        line = await reader.readline()
+        if not line:
+            return None
+        count = int(line[1:-2])
+        args = []
+        for _ in range(count):
+            length = int((await reader.readline())[1:-2])
+            args.append((await reader.readexactly(length + 2))[:-2].decode())
+        return args
+
+    # Données
+
+    def _get(self, key):
+        expires = self._expires.get(key)
+        if expires is not None and expires <= time.monotonic():
+            # Comme Redis, une expiration n'invalide pas un WATCH
+            self._data.pop(key, None)
+            del self._expires[key]
+        return self._data.get(key)
+
+    def _touch(self, key):
+        self._revisions[key] = self._revisions.get(key, 0) + 1
+
+    def _delete(self, key):
+        self._data.pop(key, None)
+        self._expires.pop(key, None)
+        self._touch(key)
+
+    def _execute(self, writer, name, args):
+        if name == 'PING':
+            return 'PONG'
+        if name in ('AUTH', 'SELECT'):
+            return 'OK'
+        if name == 'GET':
+            return self._get(args[0])
+        if name == 'SET':
+            key, value, *options = args
+            options = [option.upper() for option in options]
+            if 'NX' in options and self._get(key) is not None:
+                return None
+            self._data[key] = value
+            self._expires.pop(key, None)
+            if 'PX' in options:
+                self._expires[key] = time.monotonic() + int(options[options.index('PX') + 1]) / 1000
+            self._touch(key)
+            return 'OK'
+        if name == 'DEL':
+            existing = [key for key in args if self._get(key) is not None]
+            for key in existing:
+                self._delete(key)
+            return len(existing)
+        if name == 'HGET':
+            return (self._get(args[0]) or {}).get(args[1])
+        if name == 'HMGET':
+            fields = self._get(args[0]) or {}
+            return [fields.get(field) for field in args[1:]]
+        if name == 'HSET':
+            fields = self._data.setdefault(args[0], {})
+            pairs = list(zip(args[1::2], args[2::2]))
+            added = sum(field not in fields for field, _ in pairs)
+            fields.update(pairs)
+            self._touch(args[0])
+            return added
+        if name == 'PUBLISH':
+            subscribers = self._subscribers.get(args[0], set())
+            for subscriber in subscribers:
+                subscriber.write(self._encode(['message', args[0], args[1]]))
+            return len(subscribers)
+        return ValueError(f"commande {name} non prise en charge")
+
+    async def _serve(self, reader, writer):
+        watched = {}  # Format: {clé: n° de modification au moment du WATCH}
+        queued = None  # Commandes en attente d'EXEC, ou None hors transaction
+        subscribed = set()
+        try:
+            while True:
+                command = await self._read_command(reader)
+                if command is None:
+                    break
+                name, args = command[0].upper(), command[1:]
+                if name == 'SUBSCRIBE':
+                    for channel in args:
+                        self._subscribers.setdefault(channel, set()).add(writer)
+                        subscribed.add(channel)
+                        writer.write(self._encode(['subscribe', channel, len(subscribed)]))
+                elif name == 'WATCH':
+                    watched.update({key: self._revisions.get(key, 0) for key in args})
+                    writer.write(self._encode('OK'))
+                elif name == 'UNWATCH':
+                    watched.clear()
+                    writer.write(self._encode('OK'))
+                elif name == 'MULTI':
+                    queued = []
+                    writer.write(self._encode('OK'))
+                elif name == 'DISCARD':
+                    queued = None
+                    watched.clear()
+                    writer.write(self._encode('OK'))
+                elif name == 'EXEC':
+                    aborted = any(self._revisions.get(key, 0) != revision for key, revision in watched.items())
+                    if aborted:
+                        writer.write(b"*-1\r\n")
+                    else:
+                        writer.write(self._encode([self._execute(writer, *command) for command in queued]))
+                    queued = None
+                    watched.clear()
+                elif queued is not None:
+                    queued.append((name, args))
+                    writer.write(self._encode('QUEUED'))
+                else:
+                    writer.write(self._encode(self._execute(writer, name, args)))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            for channel in subscribed:
+                self._subscribers[channel].discard(writer)
+            writer.close()
+
+
+async def serve(host, port):
+    standin = RESPStandIn()
+    port = await standin.start(host, port)
+    print(f"Serveur RESP de test sur {host}:{port}")
+    async with standin.server:
+        await standin.server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=6390)
+    args = parser.parse_args()
+    asyncio.run(serve(args.host, args.port))
+
+
+if __name__ == '__main__':
+    main()
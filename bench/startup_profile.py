@@ -0,0 +1,85 @@
+"""Rapport de démarrage : temps d'import par module (-X importtime) et phases jusqu'à la construction du bot.
+
+Aucun jeton n'est nécessaire : le module bot est importé dans un processus séparé, sans connexion.
+
+Exemple :
+    python bench/startup_profile.py --top 20 --output startup.json
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Importé par le processus mesuré : ses phases sont écrites sur stdout
+PROBE = "import json, bot; print(json.dumps(bot.bot.startup_phases))"
+
+
+def parse_importtime(stderr):
+    """Lit la sortie de -X importtime : [(module, temps propre µs, temps cumulé µs, profondeur)]"""
+    modules = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        modules.append((name.strip(), int(own), int(cumulative), depth))
+    return modules
+
+
+def profile_startup():
+    workdir = tempfile.mkdtemp(prefix="gs-startup-")
+    env = dict(
+        os.environ,
+        DISCORD_TOKEN=os.getenv('DISCORD_TOKEN', 'startup-profile'),
+        GS_DB_PATH=os.path.join(workdir, 'startup.db'),
+        TREE_HASH_PATH=os.path.join(workdir, 'tree_hash'),
+        METRICS_PATH='',
+    )
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', PROBE],
+        cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1]), parse_importtime(result.stderr)
+
+
+def summarize(modules, top):
+    # Les modules importés directement par bot.py (profondeur 1) donnent le coût de chaque dépendance
+    direct = [m for m in modules if m[3] == 1]
+    packages = {}
+    for name, own, _, _ in modules:
+        package = name.split('.')[0]
+        packages[package] = packages.get(package, 0) + own
+    return {
+        'total_ms': next((m[2] for m in modules if m[0] == 'bot'), 0) / 1000,
+        'direct_imports_ms': {name: cumulative / 1000 for name, _, cumulative, _ in sorted(direct, key=lambda m: -m[2])[:top]},
+        'packages_ms': {name: own / 1000 for name, own in sorted(packages.items(), key=lambda item: -item[1])[:top]},
+        'slowest_modules_ms': {name: own / 1000 for name, own, _, _ in sorted(modules, key=lambda m: -m[1])[:top]},
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--top', type=int, default=15, help="Nombre de modules affichés par classement")
+    parser.add_argument('--output', help="Fichier JSON de sortie")
+    args = parser.parse_args()
+
+    phases, modules = profile_startup()
+    report = {'phases_s': phases, **summarize(modules, args.top)}
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    print("Phases (s depuis le début de l'import de bot) : " + ", ".join(f"{k} {v:.3f}" for k, v in phases.items()))
+    print(f"Import de bot : {report['total_ms']:.1f} ms")
+    for title, key in (("Imports directs (cumulé)", 'direct_imports_ms'), ("Paquets (temps propre)", 'packages_ms')):
+        print(f"\n{title} :")
+        for name, ms in report[key].items():
+            print(f"  {ms:8.1f} ms  {name}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+import asyncio
+import logging
+
+import discord
+
+log = logging.getLogger(__name__)
+
+
+class BoardScheduler:
+    """Regroupe les mises à jour du tableau GS : au plus une édition par salon et par fenêtre"""
+
+    def __init__(self, flush, interval: float):
+        self._flush = flush  # coroutine(channel) qui édite réellement le tableau
+        self.interval = interval
+        self._pending = {}  # Format: {channel_id: asyncio.Task}
+        self._last_flush = {}  # Format: {channel_id: instant de la dernière édition}
+
+    def request_update(self, channel):
+        """Marque le tableau du salon comme modifié et planifie une édition"""
+        if channel.id in self._pending:
+            # Une édition est déjà prévue, elle utilisera l'état le plus récent
+            return
+        self._pending[channel.id] = asyncio.create_task(self._flush_later(channel))
+
+    async def _flush_later(self, channel):
+        loop = asyncio.get_running_loop()
+        try:
+            last = self._last_flush.get(channel.id)
+            if last is not None:
+                delay = last + self.interval - loop.time()
+                if delay > 0:
+                    await asyncio.sleep(delay)
+        finally:
+            # Retirer la tâche avant l'édition : une modification pendant l'envoi replanifie
+            self._pending.pop(channel.id, None)
+
+        self._last_flush[channel.id] = loop.time()
+        try:
+            await self._flush(channel)
+        except Exception:
+            log.exception("Erreur lors de la mise à jour du tableau GS")
+
+
+class BoardMessageCache:
+    """Garde une référence aux messages du tableau pour les éditer sans fetch_message"""
+
+    def __init__(self):
+        self._messages = {}  # Format: {message_id: discord.Message ou discord.PartialMessage}
+        self.hits = 0  # Éditions faites directement via la référence en cache
+        self.misses = 0  # Éditions échouées (NotFound) nécessitant de recréer le tableau
+
+    async def edit(self, channel, message_id, **fields):
+        """Édite le message du tableau ; lève discord.NotFound s'il n'existe plus"""
+        message = self._messages.get(message_id)
+        if message is None:
+            # Un PartialMessage ne coûte aucune requête HTTP
+            message = channel.get_partial_message(message_id)
+        try:
+            message = await message.edit(**fields)
+        except discord.NotFound:
+            self._messages.pop(message_id, None)
+            self.misses += 1
+            raise
+        self.hits += 1
+        self._messages[message_id] = message
+        return message
+
+    async def delete(self, channel, message_id):
+        """Supprime une page devenue inutile ; ignore les messages déjà supprimés"""
+        message = self._messages.pop(message_id, None) or channel.get_partial_message(message_id)
+        try:
+            await message.delete()
+        except discord.NotFound:
+            pass
+
+    def store(self, message):
+        """Enregistre un message du tableau qui vient d'être envoyé"""
+        self._messages[message.id] = message
+
+    def stats(self):
+        return {'hits': self.hits, 'misses': self.misses}
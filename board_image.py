@@ -0,0 +1,130 @@
+import asyncio
+import hashlib
+import importlib.util
+import io
+from collections import OrderedDict
+
+# Mise en page de la grille (en pixels)
+ROW_HEIGHT = 34
+HEADER_HEIGHT = 44
+PADDING = 16
+COLUMN_WIDTHS = (300, 80, 80, 80, 110)
+COLUMNS = ("Joueur", "Déf", "Test", "Atq", "Étoiles")
+
+BACKGROUND = (47, 49, 54)
+HEADER_BACKGROUND = (32, 34, 37)
+STRIPE = (54, 57, 63)
+TEXT = (220, 221, 222)
+MUTED = (114, 118, 125)
+CONFLICT = (237, 66, 69)
+DONE = (87, 242, 135)
+STAR = (250, 201, 43)
+
+
+def available():
+    # Pillow n'est importé que par les processus de rendu : le démarrage du bot n'en paie pas le coût
+    return importlib.util.find_spec('PIL') is not None
+
+
+def _font(size):
+    from PIL import ImageFont
+
+    try:
+        return ImageFont.truetype("DejaVuSans.ttf", size), True
+    except OSError:
+        # Police bitmap par défaut : pas de glyphe étoile
+        return ImageFont.load_default(), False
+
+
+def render_board_png(title, rows, contested):
+    """Dessine la grille joueurs × Déf/Test/Atq/étoiles et retourne le PNG (exécuté dans un processus séparé)
+
+    `rows` : [(nom, défense, test, attaque, étoiles)], 0 pour une action non renseignée.
+    `contested` : (cibles de défense, de test, d'attaque) choisies par plusieurs joueurs, surlignées.
+    """
+    from PIL import Image, ImageDraw
+
+    font, has_star = _font(18)
+    title_font, _ = _font(22)
+    width = sum(COLUMN_WIDTHS) + 2 * PADDING
+    height = HEADER_HEIGHT * 2 + ROW_HEIGHT * max(len(rows), 1) + PADDING
+    image = Image.new("RGB", (width, height), BACKGROUND)
+    draw = ImageDraw.Draw(image)
+
+    draw.text((PADDING, 10), title, font=title_font, fill=TEXT)
+    top = HEADER_HEIGHT
+    draw.rectangle((0, top, width, top + HEADER_HEIGHT), fill=HEADER_BACKGROUND)
+    x = PADDING
+    for label, column_width in zip(COLUMNS, COLUMN_WIDTHS):
+        draw.text((x, top + 12), label, font=font, fill=MUTED)
+        x += column_width
+
+    top += HEADER_HEIGHT
+    if not rows:
+        draw.text((PADDING, top + 8), "Aucun joueur", font=font, fill=MUTED)
+    for i, (name, *actions, stars) in enumerate(rows):
+        y = top + i * ROW_HEIGHT
+        if i % 2:
+            draw.rectangle((0, y, width, y + ROW_HEIGHT), fill=STRIPE)
+        complete = all(actions)
+        draw.text((PADDING, y + 7), name[:24], font=font, fill=DONE if complete else TEXT)
+        x = PADDING + COLUMN_WIDTHS[0]
+        for value, conflicts, column_width in zip(actions, contested, COLUMN_WIDTHS[1:]):
+            color = CONFLICT if value in conflicts else (TEXT if value else MUTED)
+            draw.text((x, y + 7), str(value) if value else "-", font=font, fill=color)
+            x += column_width
+        if stars:
+            draw.text((x, y + 7), "★" * stars if has_star else str(stars), font=font, fill=STAR)
+
+    output = io.BytesIO()
+    image.save(output, format="PNG", optimize=True)
+    return output.getvalue()
+
+
+class BoardImageRenderer:
+    """Rendu PNG du tableau dans un pool de processus, mis en cache par empreinte des données"""
+
+    def __init__(self, max_workers=1, cache_size=16):
+        self.max_workers = max_workers
+        self.cache_size = cache_size
+        self._pool = None
+        self._cache = OrderedDict()  # Format: {empreinte: PNG}, du plus ancien au plus récent
+        self._running = {}  # Format: {empreinte: asyncio.Future} des rendus en cours
+        self.renders = 0
+        self.hits = 0
+
+    @staticmethod
+    def digest(title, rows, contested):
+        return hashlib.sha1(repr((title, rows, contested)).encode()).hexdigest()
+
+    async def render(self, title, rows, contested):
+        """Retourne (empreinte, PNG) ; un même état n'est rendu qu'une fois, même en cas d'appels simultanés"""
+        digest = self.digest(title, rows, contested)
+        png = self._cache.get(digest)
+        if png is not None:
+            self._cache.move_to_end(digest)
+            self.hits += 1
+            return digest, png
+        running = self._running.get(digest)
+        if running is not None:
+            return digest, await running
+
+        loop = asyncio.get_running_loop()
+        if self._pool is None:
+            from concurrent.futures import ProcessPoolExecutor
+            self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        future = loop.run_in_executor(self._pool, render_board_png, title, rows, contested)
+        self._running[digest] = future
+        try:
+            png = await future
+        finally:
+            del self._running[digest]
+        self.renders += 1
+        self._cache[digest] = png
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+        return digest, png
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
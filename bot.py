@@ -1,124 +1,691 @@
+import time
+# Début de l'import du module : origine des temps du rapport de démarrage
+BOOT_STARTED = time.perf_counter()
+
 import discord
 from discord import app_commands
 from discord.ext import commands
 import datetime
+import functools
+import logging
 from dotenv import load_dotenv
 import os
+import sys
+import asyncio
+import hashlib
+import io
+import json
+import socket
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
 from typing import Optional
 
+import board_image
+from backend import BoardLeases, create_backend
+from board import BoardMessageCache, BoardScheduler
+from bulk import BulkEntryError, parse_csv, parse_roster, parse_text
+from eventlog import EventRecorder
+from logs import setup_logging
+from metrics import CommandMetrics, write_prometheus
+from models import ACTIONS, TARGETS
+from monitor import LoopWatchdog
+from outbox import PRIORITY_BOARD, PRIORITY_PIN, PRIORITY_REMINDER, Outbox
+from permissions import PermissionService, parse_officer_roles
+from reminders import ReminderScheduler, format_duration, parse_duration, parse_offsets
+from render import paginate
+from sessions import SessionRegistry
+from storage import GSStore
+from views import BoardView
+
+log = logging.getLogger('gs')
+
+# Phases du démarrage antérieures à la construction du bot (secondes depuis BOOT_STARTED)
+BOOT_PHASES = {'import': time.perf_counter() - BOOT_STARTED}
+
 # Configuration
 load_dotenv()
 TOKEN = os.getenv('DISCORD_TOKEN')
-GS_CHANNEL_ID = int(os.getenv('CHANNEL_ID'))
-MAX_PLAYERS = 26
+# Salons GS autorisés (liste séparée par des virgules) ; vide = tout salon où /init_gs est lancé
+GS_CHANNEL_IDS = {int(channel_id) for channel_id in os.getenv('CHANNEL_ID', '').split(',') if channel_id.strip()}
+# Répartir la connexion gateway sur plusieurs shards (AutoShardedBot)
+USE_SHARDING = os.getenv('SHARDED', '0') == '1'
+# Profil gateway : 'full' (tous les membres et messages en cache) ou 'lean' (slash uniquement, cache minimal)
+GATEWAY_PROFILE = os.getenv('GATEWAY_PROFILE', 'full')
+# Rapport de démarrage JSON écrit au premier on_ready (vide pour désactiver), et arrêt juste après si EXIT_ON_READY=1
+READY_REPORT_PATH = os.getenv('READY_REPORT_PATH', '')
+EXIT_ON_READY = os.getenv('EXIT_ON_READY', '0') == '1'
+# Mode rapide : boucle uvloop et JSON orjson pour discord.py (pip install uvloop "discord.py[speed]")
+SPEED_MODE = os.getenv('SPEED_MODE', '0') == '1'
+# Rôle(s) officier par serveur ('guild_id:role_id|role_id,...'), sinon OFFICER_ROLE_ID
+OFFICER_ROLES = parse_officer_roles(os.getenv('OFFICER_ROLES', ''))
+OFFICER_ROLE_ID = int(os.getenv('OFFICER_ROLE_ID', '1336091937567936596'))
+MAX_PLAYERS = int(os.getenv('MAX_PLAYERS', '26'))
+# Joueurs par champ d'embed, et place disponible pour les champs de joueurs dans une page (limite Discord : 6000
+# caractères ; le reste couvre le titre, la description, le pied de page et le champ des cibles libres)
+PLAYERS_PER_FIELD = 12
+PAGE_BUDGET = 5500
+# Fenêtre minimale (en secondes) entre deux éditions du tableau épinglé
+BOARD_UPDATE_INTERVAL = float(os.getenv('BOARD_UPDATE_INTERVAL', '2'))
+# Affichage du tableau : 'embed' (texte) ou 'image' (grille PNG rendue hors de la boucle, nécessite Pillow)
+BOARD_MODE = os.getenv('BOARD_MODE', 'embed')
+BOARD_IMAGE_WORKERS = int(os.getenv('BOARD_IMAGE_WORKERS', '1'))
+BOARD_IMAGE_NAME = "gs_board.png"
+# Base SQLite où l'état de la GS est journalisé pour survivre aux redémarrages
+GS_DB_PATH = os.getenv('GS_DB_PATH', 'gs_state.db')
+# Empreinte de l'arbre de commandes déjà envoyé à Discord
+TREE_HASH_PATH = os.getenv('TREE_HASH_PATH', '.command_tree_hash')
+# Forcer la synchronisation des commandes slash (FORCE_SYNC=1 ou `python bot.py --sync`)
+FORCE_SYNC = os.getenv('FORCE_SYNC', '0') == '1' or '--sync' in sys.argv
+# État partagé entre processus : '' (local), 'memory' ou 'redis://hôte:port/db'
+STATE_BACKEND = os.getenv('STATE_BACKEND', '')
+# Identifiant de ce processus et durée du bail sur les tableaux (seul le propriétaire les édite)
+WORKER_ID = os.getenv('WORKER_ID') or f"{socket.gethostname()}:{os.getpid()}"
+BOARD_LEASE_TTL = float(os.getenv('BOARD_LEASE_TTL', '30'))
+# Enregistrement JSONL des mutations soumises, rejouable avec bench/replay_gs.py (vide pour désactiver)
+EVENT_LOG_PATH = os.getenv('EVENT_LOG_PATH', '')
+# Chien de garde de la boucle : un handler bloquant plus longtemps que ce seuil (s) est signalé
+LOOP_LAG_THRESHOLD = float(os.getenv('LOOP_LAG_THRESHOLD', '0.1'))
+# Profils cProfile et piles capturées pendant les blocages (profilage activé avec /gs_profile)
+PROFILE_DIR = os.getenv('PROFILE_DIR', 'profiles')
+# Export périodique des métriques au format Prometheus (METRICS_PATH vide pour désactiver)
+METRICS_PATH = os.getenv('METRICS_PATH', 'gs_metrics.prom')
+METRICS_INTERVAL = float(os.getenv('METRICS_INTERVAL', '60'))
+# Taille maximale d'un fichier CSV importé par /bulk (en octets)
+BULK_MAX_FILE_SIZE = 64 * 1024
+# Rappels des actions manquantes : délais avant la fin par défaut, en MP ('dm') ou mention dans le salon ('channel')
+REMINDER_OFFSETS = parse_offsets(os.getenv('REMINDER_OFFSETS', '6h,1h'))
+REMINDER_MODE = os.getenv('REMINDER_MODE', 'channel')
+# Cadence des rappels sortants : messages par seconde et rafale maximale
+REMINDER_RATE = float(os.getenv('REMINDER_RATE', '1'))
+REMINDER_BURST = int(os.getenv('REMINDER_BURST', '5'))
 
 # Emojis pour chaque type d'action
 DEFENSE_EMOJI = "🛡️"
 TEST_EMOJI = "🔍"
 ATTACK_EMOJI = "⚔️"
 
-class GSBot(commands.Bot):
+BOOT_PHASES['configuration'] = time.perf_counter() - BOOT_STARTED
+
+BotBase = commands.AutoShardedBot if USE_SHARDING else commands.Bot
+
+class GSBot(BotBase):
     def __init__(self):
         intents = discord.Intents.default()
-        intents.message_content = True
         intents.members = True
-        super().__init__(command_prefix='!', intents=intents)
-
-        # Structure de données pour la GS
-        self.gs_data = {
-            'players': {},  # Format: {user_id: {"name": display_name, "mention": mention}}
-            'defenses': {},
-            'tests': {},
-            'attacks': {},
-            'stars': {},  # Pour stocker le nombre d'étoiles
-            'message_id': None  # Pour stocker l'ID du message épinglé
-        }
+        options = {}
+        if GATEWAY_PROFILE == 'lean':
+            # Toutes les commandes sont des commandes slash : les messages du serveur sont inutiles
+            intents.messages = False
+            options = {
+                'max_messages': None,
+                # Pas de téléchargement des membres au démarrage : les interactions portent déjà
+                # les membres résolus (auteur, options), et les joueurs sont gardés dans le PlayerRecord
+                'chunk_guilds_at_startup': False,
+                'member_cache_flags': discord.MemberCacheFlags.none(),
+            }
+        else:
+            intents.message_content = True
+        metrics = CommandMetrics()
+        # Envois en arrière-plan (tableau, épingles, rappels), toujours après les réponses aux interactions
+        outbox = Outbox(REMINDER_RATE, REMINDER_BURST)
+        trace = metrics.trace_config()
+        trace.on_request_end.append(outbox.trace_hook())
+        super().__init__(command_prefix='!', intents=intents, http_trace=trace, **options)
+
+        # Latences et appels REST Discord par commande
+        self.metrics = metrics
+        self.metrics_task = None  # Export Prometheus périodique (METRICS_PATH)
+        metrics.install(self.http)
+        # Retard de la boucle d'événements et handlers qui la bloquent
+        self.watchdog = LoopWatchdog(LOOP_LAG_THRESHOLD, profile_dir=PROFILE_DIR)
+        metrics.watch = self.watchdog.watch
+        self.outbox = outbox
+
+        # Journal des mutations, écrit par lots hors du chemin des interactions
+        self.store = GSStore(GS_DB_PATH)
+        # Lots de mutations soumis, enregistrés pour le banc de rejeu
+        self.event_log = EventRecorder(EVENT_LOG_PATH) if EVENT_LOG_PATH else None
+        # État partagé avec les autres processus (verrou optimiste par session) et baux sur les tableaux
+        self.backend = create_backend(STATE_BACKEND)
+        self.board_leases = BoardLeases(self.backend, WORKER_ID, BOARD_LEASE_TTL)
+        # Une session GS par (serveur, salon), chacune avec son propre état (GSSession) modifié par son acteur
+        self.sessions = SessionRegistry(
+            self.store.record, self.event_log.record if self.event_log is not None else None, MAX_PLAYERS,
+            self.backend, WORKER_ID
+        )
+
+        # Regroupe les éditions du tableau pour rester sous les limites de débit
+        self.board_scheduler = BoardScheduler(self.flush_board, BOARD_UPDATE_INTERVAL)
+        # Référence au message épinglé pour éviter un fetch_message avant chaque édition
+        self.board_messages = BoardMessageCache()
+        # Décisions d'autorisation mises en cache, invalidées par les événements de rôles
+        # Sans cache des membres, on_member_update n'arrive pas : on s'appuie sur une expiration plus courte
+        self.permissions = PermissionService(OFFICER_ROLES, {OFFICER_ROLE_ID}, ttl=60 if GATEWAY_PROFILE == 'lean' else 300)
+        # Menus de saisie attachés à la première page du tableau
+        self.board_view = BoardView(self.submit_from_board, {
+            'defense': (DEFENSE_EMOJI, "Défense"),
+            'test': (TEST_EMOJI, "Test"),
+            'attack': (ATTACK_EMOJI, "Attaque"),
+        })
+        # Rendu PNG du tableau dans un pool de processus (mode image)
+        self.board_images = None
+        if BOARD_MODE == 'image':
+            if board_image.available():
+                self.board_images = board_image.BoardImageRenderer(BOARD_IMAGE_WORKERS)
+            else:
+                log.warning("BOARD_MODE=image nécessite Pillow : tableau affiché en texte")
+        # Échéances des rappels de toutes les sessions
+        self.reminders = ReminderScheduler(self.send_reminders)
+
+        # Durées des phases de démarrage depuis le début de l'import, affichées une fois le bot prêt
+        self.started_at = BOOT_STARTED
+        self.startup_phases = dict(BOOT_PHASES)
+        self.mark_startup('construction')
+
+    def mark_startup(self, phase):
+        if phase not in self.startup_phases:
+            self.startup_phases[phase] = time.perf_counter() - self.started_at
 
     async def setup_hook(self):
-        await self.tree.sync()
+        self.mark_startup('connexion')
+        # Restaurer les GS en cours avant de recevoir des commandes
+        self.sessions.restore(await asyncio.to_thread(self.store.load))
+        self.store.start()
+        if self.backend is not None:
+            await self.backend.start(self.state_changed, self.backend_reconnected)
+        if self.event_log is not None:
+            self.event_log.start()
+        # Reprogrammer les rappels restants ; les délais déjà traités ne sont pas renvoyés
+        for session in self.sessions:
+            state = session.state
+            if state.deadline is not None and state.deadline > time.time():
+                self.reminders.schedule(session.key, state.deadline, state.reminder_offsets, done=state.reminded)
+        self.reminders.start()
+        self.outbox.start()
+        self.watchdog.start()
+        # Réactiver les menus des tableaux déjà envoyés (routage par custom_id)
+        self.add_view(self.board_view)
+        if METRICS_PATH:
+            self.metrics_task = asyncio.create_task(self.export_metrics())
+        self.mark_startup('restauration')
+        await self.sync_commands()
+        self.mark_startup('synchronisation')
+
+    async def sync_commands(self):
+        """Synchronise les commandes slash seulement si l'arbre a changé depuis le dernier envoi"""
+        payload = sorted((command.to_dict(self.tree) for command in self.tree.get_commands()), key=lambda c: c['name'])
+        tree_hash = hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+        stored_hash = f"{self.application_id}:{tree_hash}"
+
+        if not FORCE_SYNC:
+            try:
+                with open(TREE_HASH_PATH) as f:
+                    if f.read().strip() == stored_hash:
+                        log.info("Commandes slash inchangées, synchronisation ignorée")
+                        return
+            except FileNotFoundError:
+                pass
+
+        try:
+            synced = await self.tree.sync()
+            log.info("Commandes slash synchronisées : %d commandes", len(synced))
+        except Exception:
+            log.exception("Erreur lors de la synchronisation des commandes")
+            return
+
+        with open(TREE_HASH_PATH, 'w') as f:
+            f.write(stored_hash)
+
+    async def on_message(self, message):
+        # Aucune commande préfixée : inutile d'analyser chaque message du serveur
+        if GATEWAY_PROFILE != 'lean':
+            await self.process_commands(message)
+
+    def startup_report(self):
+        """Temps de démarrage par phase, mémoire et taille des caches au premier on_ready"""
+        report = {
+            'profile': GATEWAY_PROFILE,
+            'phases': {phase: round(elapsed, 3) for phase, elapsed in self.startup_phases.items()},
+            'guilds': len(self.guilds),
+            'cached_members': sum(len(guild.members) for guild in self.guilds),
+            'cached_messages': len(self.cached_messages),
+            'loop': type(asyncio.get_running_loop()).__module__.split('.')[0],
+            'orjson': discord.utils.HAS_ORJSON,
+        }
+        if resource is not None:
+            # ru_maxrss est en kilo-octets sous Linux
+            report['max_rss_mb'] = round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)
+        return report
+
+    async def close(self):
+        if self.metrics_task is not None:
+            self.metrics_task.cancel()
+            await asyncio.gather(self.metrics_task, return_exceptions=True)
+        await self.watchdog.close()
+        await self.reminders.close()
+        await self.outbox.close()
+        await self.store.close()
+        if self.backend is not None:
+            await self.backend.close()
+        if self.event_log is not None:
+            await self.event_log.close()
+        if self.board_images is not None:
+            self.board_images.close()
+        await super().close()
+
+    async def _run_event(self, coro, event_name, *args, **kwargs):
+        # Chaque listener est chronométré par le chien de garde
+        def watched(*args, **kwargs):
+            return self.watchdog.watch(event_name, coro(*args, **kwargs))
+        await super()._run_event(watched, event_name, *args, **kwargs)
+
+    async def on_interaction(self, interaction):
+        # Les envois en attente laissent passer la réponse à cette interaction
+        self.outbox.expect_ack(interaction.id)
+
+    def state_changed(self, key, version, origin):
+        # Commit d'un autre processus : recharger la session, puis publier si ce processus a le tableau
+        session = self.sessions.notify(key, version, origin)
+        if session is not None:
+            asyncio.create_task(self.sync_session(session))
+
+    def backend_reconnected(self):
+        # Des commits ont pu être manqués pendant la coupure : recharger toutes les sessions
+        for session in self.sessions.mark_all_stale():
+            asyncio.create_task(self.sync_session(session))
+
+    async def sync_session(self, session):
+        try:
+            await session.refresh()
+        except Exception:
+            log.exception("Erreur lors du rechargement de la session %s", session.key)
+            return
+        state = session.state
+        if state.deadline is not None and state.deadline > time.time():
+            # Échéance fixée ailleurs : les rappels partent du propriétaire du tableau ; la plupart des
+            # commits ne touchent pas aux rappels, qui ne sont alors pas reprogrammés
+            self.reminders.reschedule(session.key, state.deadline, state.reminder_offsets, done=state.reminded)
+        channel = self.get_channel(session.channel_id)
+        if channel is not None:
+            self.board_scheduler.request_update(channel)
+
+    async def flush_board(self, channel):
+        session = self.sessions.get(channel.guild.id, channel.id)
+        # Avec un backend partagé, seul le propriétaire du bail édite le tableau
+        if session is not None and await self.board_leases.owns(session.key):
+            self.outbox.put(
+                ('board', channel.id), functools.partial(self.publish_board, session, channel),
+                PRIORITY_BOARD, route=('channel', channel.id)
+            )
+
+    async def publish_board(self, session, channel):
+        with self.metrics.track('board_update'):
+            if session.stale:
+                # Notification d'un commit d'un autre processus pas encore rechargée
+                await session.refresh()
+            # Une GS qui vient d'être initialisée n'a pas encore de tableau : il est créé ici
+            await self.watchdog.watch('board_update', update_gs_message(session, channel, create=bool(session.state)))
+
+    async def send_reminders(self, key, offset):
+        with self.metrics.track('reminders'):
+            await dispatch_reminders(key, offset)
+
+    async def submit_from_board(self, interaction, action, target):
+        with self.metrics.track('board_select'):
+            await submit_board_action(interaction, action, target)
+
+    async def export_metrics(self):
+        while True:
+            await asyncio.sleep(METRICS_INTERVAL)
+            try:
+                await asyncio.to_thread(write_prometheus, METRICS_PATH, self.metrics.render_prometheus())
+            except OSError:
+                log.exception("Erreur lors de l'export des métriques")
 
 bot = GSBot()
 
-def create_gs_embed():
-    """Crée un embed Discord avec le tableau GS"""
+def format_targets_field(state):
+    """Champ du tableau listant les cibles libres et celles choisies par plusieurs joueurs"""
+    lines = []
+    for action, emoji, label in (('defense', DEFENSE_EMOJI, "Déf"), ('test', TEST_EMOJI, "Test"), ('attack', ATTACK_EMOJI, "Atq")):
+        free = state.free_targets(action)
+        line = f"{emoji} {label} : {', '.join(map(str, free)) if free else 'aucune'}"
+        contested = state.contested_targets(action)
+        if contested:
+            line += " · ⚠️ " + ", ".join(f"{target} (×{count})" for target, count in sorted(contested.items()))
+        lines.append(line)
+    return ("🎯 Cibles libres", "\n".join(lines))
+
+def format_player_block(mention, def_value, test_value, atq_value, star_count):
+    """Construit le bloc de texte d'un joueur dans le tableau"""
+    stars = "⭐" * star_count
+    player_block = [
+        f"**{mention}** :",
+        f"{DEFENSE_EMOJI} Déf: `{def_value}`",
+        f"{TEST_EMOJI} Test: `{test_value}`",
+        f"{ATTACK_EMOJI} Atq: `{atq_value}`",
+        f"{stars}" if stars else "",
+        "─────────────────"  # Séparateur
+    ]
+    return "\n".join(player_block)
+
+def build_gs_embed(fields, page, page_count):
+    """Construit l'embed Discord d'une page à partir des champs (nom, valeur) déjà rendus"""
+    title = "📊 Tableau Guerre Sainte"
+    if page_count > 1:
+        title += f" ({page + 1}/{page_count})"
     embed = discord.Embed(
-        title="📊 Tableau Guerre Sainte",
+        title=title,
         description="État actuel des défenses, tests et attaques\n",
         color=discord.Color.blue(),
         timestamp=datetime.datetime.now()
     )
+    for name, value in fields:
+        embed.add_field(name=name, value=value, inline=False)
+    embed.set_footer(text="Dernière mise à jour")
+    return embed
 
-    # Trier les joueurs
-    sorted_players = sorted(bot.gs_data['players'].items(), key=lambda x: x[1]["name"].lower())
-
-    # Diviser en deux groupes de 12
-    players_per_field = 12
-
-    # Diviser les joueurs en deux groupes
-    for i in range(0, len(sorted_players), players_per_field):
-        group = sorted_players[i:i + players_per_field]
-        player_blocks = []
-
-        for user_id, player_info in group:
-            def_value = bot.gs_data['defenses'].get(user_id, '-')
-            test_value = bot.gs_data['tests'].get(user_id, '-')
-            atq_value = bot.gs_data['attacks'].get(user_id, '-')
-            stars = "⭐" * bot.gs_data['stars'].get(user_id, 0)
-
-            player_block = [
-                f"**{player_info['mention']}** :",
-                f"{DEFENSE_EMOJI} Déf: `{def_value}`",
-                f"{TEST_EMOJI} Test: `{test_value}`",
-                f"{ATTACK_EMOJI} Atq: `{atq_value}`",
-                f"{stars}" if stars else "",
-                "─────────────────"  # Séparateur
-            ]
-            player_blocks.append("\n".join(player_block))
-
-        # Ajouter un champ pour ce groupe
-        field_value = "\n".join(player_blocks)
-        if field_value:
-            field_name = "Participants Groupe 1" if i == 0 else "Participants Groupe 2"
-            embed.add_field(
-                name=f"{field_name} ({len(bot.gs_data['players'])}/{MAX_PLAYERS})",
-                value=field_value,
-                inline=False
+def render_gs_board(session):
+    """Rend le tableau GS d'une session et retourne une liste de pages (embed, empreinte du contenu)"""
+    cache = session.render_cache
+    # L'état ne change qu'entre deux lots de l'acteur : un rendu par version suffit
+    version, rendered = cache.rendered
+    if version == session.version:
+        return rendered
+    blocks = []
+    for user_id in cache.sorted_ids():
+        player = session.state.players[user_id]
+        signature = (
+            player.mention,
+            player.defense or '-',
+            player.test or '-',
+            player.attack or '-',
+            player.stars
+        )
+        # Le bloc n'est reconstruit que si les données du joueur ont changé
+        blocks.append((user_id, cache.block(user_id, signature, format_player_block)))
+
+    if not blocks:
+        rendered = [cache.embed_for(0, 1, [(f"Participants (0/{MAX_PLAYERS})", "Aucun joueur")], build_gs_embed)]
+        cache.rendered = (session.version, rendered)
+        return rendered
+
+    # Répartir les joueurs en champs puis en pages, dans les limites de taille des embeds
+    pages = paginate(blocks, PLAYERS_PER_FIELD, PAGE_BUDGET)
+    rendered = []
+    group = 0
+    for index, page in enumerate(pages):
+        # Les cibles libres sont affichées en tête de la première page
+        fields = [format_targets_field(session.state)] if index == 0 else []
+        for field in page:
+            group += 1
+            fields.append((f"Participants Groupe {group} ({len(blocks)}/{MAX_PLAYERS})", "\n".join(text for _, text in field)))
+        rendered.append(cache.embed_for(index, len(pages), fields, build_gs_embed))
+    cache.rendered = (session.version, rendered)
+    return rendered
+
+def create_gs_embed(session):
+    """Crée un embed Discord avec la première page du tableau GS"""
+    return render_gs_board(session)[0][0]
+
+async def render_board_image(session):
+    """Rend le tableau en une seule page : cibles libres en texte, grille des joueurs en PNG
+
+    Retourne (embed, empreinte, PNG) ; le PNG n'est recalculé que si les données du tableau ont changé.
+    """
+    state = session.state
+    rows = []
+    for user_id in session.render_cache.sorted_ids():
+        player = state.players[user_id]
+        rows.append((player.name, player.defense or 0, player.test or 0, player.attack or 0, player.stars))
+    contested = tuple(tuple(sorted(state.contested_targets(action))) for action in ACTIONS)
+    digest, png = await bot.board_images.render("Tableau Guerre Sainte", tuple(rows), contested)
+    embed = build_gs_embed([format_targets_field(state), (f"Participants ({len(rows)}/{MAX_PLAYERS})", "Tableau ci-dessous")], 0, 1)
+    embed.set_image(url=f"attachment://{BOARD_IMAGE_NAME}")
+    return embed, digest, png
+
+async def render_board_pages(session):
+    """Pages du tableau selon BOARD_MODE : liste de (embed, empreinte, PNG ou None)"""
+    if bot.board_images is not None:
+        return [await render_board_image(session)]
+    return [(embed, digest, None) for embed, digest in render_gs_board(session)]
+
+async def update_gs_message(session, channel, create=False):
+    """Met à jour les pages du tableau GS ; seules les pages dont le contenu a changé sont éditées"""
+    if not session.state.message_ids and not create:
+        return False
+
+    cache = session.render_cache
+    # Copie de travail : l'état n'est modifié que par l'acteur de la session
+    message_ids = list(session.state.message_ids)
+    generation = session.generation
+    pages = await render_board_pages(session)
+    pages_changed = False
+
+    for index, (embed, digest, png) in enumerate(pages):
+        if index < len(message_ids):
+            if cache.sent_digests.get(index) == digest:
+                # Cette page est déjà à jour, inutile d'éditer le message
+                continue
+            try:
+                if png is not None:
+                    # La nouvelle image remplace la précédente
+                    attachments = [discord.File(io.BytesIO(png), BOARD_IMAGE_NAME)]
+                    await bot.board_messages.edit(channel, message_ids[index], embed=embed, attachments=attachments, view=bot.board_view)
+                elif index == 0:
+                    await bot.board_messages.edit(channel, message_ids[index], embed=embed, view=bot.board_view)
+                else:
+                    await bot.board_messages.edit(channel, message_ids[index], embed=embed)
+                cache.sent_digests[index] = digest
+                continue
+            except discord.NotFound:
+                pass
+
+        # Page nouvelle ou supprimée : on (re)crée le message
+        if index == 0:
+            files = [discord.File(io.BytesIO(png), BOARD_IMAGE_NAME)] if png is not None else []
+            new_message = await channel.send(embed=embed, files=files, view=bot.board_view)
+            bot.outbox.put(
+                ('pin', new_message.id), functools.partial(new_message.pin, reason="Tableau GS"),
+                PRIORITY_PIN, route=('channel', channel.id)
             )
+        else:
+            new_message = await channel.send(embed=embed)
+        if index < len(message_ids):
+            message_ids[index] = new_message.id
+        else:
+            message_ids.append(new_message.id)
+        bot.board_messages.store(new_message)
+        cache.sent_digests[index] = digest
+        pages_changed = True
+
+    # Le roster a rétréci : supprimer les pages en trop
+    for index in range(len(pages), len(message_ids)):
+        await bot.board_messages.delete(channel, message_ids[index])
+        cache.sent_digests.pop(index, None)
+        pages_changed = True
+    del message_ids[len(pages):]
+
+    # Une GS réinitialisée pendant l'envoi a déjà son propre tableau (ou le créera)
+    if pages_changed and session.generation == generation:
+        await session.apply(('pages', message_ids))
+    return True
+
+async def submit_board_action(interaction: discord.Interaction, action: str, target: int):
+    """Enregistre une action choisie dans les menus du tableau et met la page à jour via la réponse"""
+    session = get_session(interaction)
+
+    if not is_gs_channel(interaction) or session is None or interaction.user.id not in session.state:
+        await interaction.response.send_message(
+            f"{interaction.user.mention} vous n'êtes pas dans la liste des joueurs GS !",
+            ephemeral=True
+        )
+        return
 
-    if not bot.gs_data['players']:
-        embed.add_field(
-            name=f"Participants (0/{MAX_PLAYERS})",
-            value="Aucun joueur",
-            inline=False
+    if interaction.message is None or interaction.message.id != session.state.message_id:
+        await interaction.response.send_message("❌ Ce tableau n'est plus celui de la GS en cours.", ephemeral=True)
+        return
+
+    if not await session.apply(('set', interaction.user.id, action, target)):
+        await interaction.response.send_message(
+            f"{interaction.user.mention} vous n'êtes pas dans la liste des joueurs GS !",
+            ephemeral=True
         )
+        return
 
-    embed.set_footer(text="Dernière mise à jour")
-    return embed
+    if bot.board_images is not None:
+        # L'image est rendue hors de la boucle : accuser réception tout de suite, le planificateur publie
+        await interaction.response.defer()
+        bot.board_scheduler.request_update(interaction.channel)
+        return
+
+    # L'accusé de réception édite directement la première page : pas d'appel REST séparé
+    embed, digest = render_gs_board(session)[0]
+    await interaction.response.edit_message(embed=embed, view=bot.board_view)
+    session.render_cache.sent_digests[0] = digest
+
+    # Les autres pages (ou une édition concurrente plus récente) passent par le planificateur
+    bot.board_scheduler.request_update(interaction.channel)
+
+def target_conflict_note(session, action, user_id, target):
+    """Avertissement si d'autres joueurs ont déjà choisi cette cible pour cette action"""
+    others = [session.state.get(other).mention for other in session.state.claimants(action, target) if other != user_id]
+    if not others:
+        return ""
+    return f"\n⚠️ Cible {target} déjà choisie par {', '.join(others)}."
+
+def target_choices(interaction: discord.Interaction, action: str, current: str):
+    """Suggestions d'autocomplétion : cibles libres (et celle déjà choisie par le joueur)"""
+    session = get_session(interaction)
+    user_id = interaction.user.id
+    choices = []
+    for target in TARGETS:
+        if not str(target).startswith(str(current).strip()):
+            continue
+        claimants = session.state.claimants(action, target) if session is not None else frozenset()
+        if not claimants:
+            choices.append(app_commands.Choice(name=f"{target} (libre)", value=target))
+        elif claimants == {user_id}:
+            choices.append(app_commands.Choice(name=f"{target} (votre cible)", value=target))
+    return choices
+
+def chunk_lines(header, lines, limit=2000):
+    """Regroupe des lignes en messages de moins de `limit` caractères, chacun précédé de l'en-tête"""
+    chunks = []
+    current = header
+    for line in lines:
+        if len(current) + 1 + len(line) > limit:
+            chunks.append(current)
+            current = header
+        current += "\n" + line
+    chunks.append(current)
+    return chunks
+
+async def send_dm(user_id, content):
+    """Envoie un MP sans passer par le cache des membres (compatible avec le profil lean)"""
+    channel = await bot.create_dm(discord.Object(id=user_id))
+    await channel.send(content)
+
+async def dispatch_reminders(key, offset):
+    """Rappelle leurs actions manquantes aux joueurs qui n'ont pas encore reçu ce rappel"""
+    session = bot.sessions.get(*key)
+    if session is None or session.state.deadline is None or not await bot.board_leases.owns(key):
+        return
 
-async def update_gs_message(channel):
-    """Met à jour le message épinglé du tableau GS"""
-    if bot.gs_data['message_id']:
+    already = session.state.reminded.get(offset, ())
+    missing, _ = session.state.missing_actions()
+    todo = {}  # Format: {PlayerRecord: [actions manquantes]}
+    for action, label in (('defense', "Défense"), ('test', "Test"), ('attack', "Attaque")):
+        for player in missing[action]:
+            if player.user_id not in already:
+                todo.setdefault(player, []).append(label)
+    if not todo:
+        return
+
+    # Journalisé avant l'envoi : un redémarrage ne renvoie pas le même rappel
+    user_ids = sorted(player.user_id for player in todo)
+    await session.apply(('reminded', offset, user_ids))
+
+    end = discord.utils.format_dt(datetime.datetime.fromtimestamp(session.state.deadline, tz=datetime.timezone.utc), 'R')
+    if REMINDER_MODE == 'dm':
+        for player, labels in todo.items():
+            content = f"⏰ Fin de la Guerre Sainte {end} : il vous manque {', '.join(labels)} (<#{session.channel_id}>)."
+            await bot.outbox.submit(
+                ('dm', key, offset, player.user_id), functools.partial(send_dm, player.user_id, content),
+                PRIORITY_REMINDER, route=('dm',)
+            )
+    else:
+        # Une mention groupée par message plutôt qu'un message par joueur
+        channel = bot.get_partial_messageable(session.channel_id, guild_id=session.guild_id)
+        lines = [f"{player.mention} : {', '.join(labels)}" for player, labels in todo.items()]
+        for index, content in enumerate(chunk_lines(f"⏰ **Fin de la Guerre Sainte {end}**, actions manquantes :", lines)):
+            await bot.outbox.submit(('channel', key, offset, index), functools.partial(
+                channel.send, content, allowed_mentions=discord.AllowedMentions(users=True, roles=False, everyone=False)
+            ), PRIORITY_REMINDER, route=('channel', session.channel_id))
+
+def retire_board(channel, message_id):
+    """Planifie le retrait des menus de saisie du tableau d'une GS terminée, qui reste affiché tel quel"""
+    async def remove_view():
         try:
-            message = await channel.fetch_message(bot.gs_data['message_id'])
-            await message.edit(embed=create_gs_embed())
-            return True
+            await bot.board_messages.edit(channel, message_id, view=None)
         except discord.NotFound:
-            # Si le message n'existe plus, on en crée un nouveau
-            new_message = await channel.send(embed=create_gs_embed())
-            await new_message.pin(reason="Tableau GS")
-            bot.gs_data['message_id'] = new_message.id
-            return True
-    return False
+            pass
+
+    bot.outbox.put(('retire', message_id), remove_view, PRIORITY_BOARD, route=('channel', channel.id))
+
+async def start_new_war(session, roster):
+    """Remplace la GS du salon par une nouvelle avec ce roster [(user_id, nom, mention)]
+
+    La GS précédente est archivée dans l'historique ; retourne l'id de son tableau (à retirer) ou None.
+    """
+    previous_board = session.state.message_id
+    bot.reminders.cancel(session.key)
+    if session.state:
+        # Archivée juste avant la remise à zéro, sans mutation intercalée
+        await session.apply_many([('archive', time.time()), ('init', roster)])
+    else:
+        await session.apply(('init', roster))
+    return previous_board
+
+async def resolve_members(guild, user_ids):
+    """Résout des membres en bloc : cache d'abord, puis une requête gateway par tranche de 100 manquants"""
+    members = {}
+    missing = []
+    for user_id in user_ids:
+        member = guild.get_member(user_id)
+        if member is not None:
+            members[user_id] = member
+        else:
+            missing.append(user_id)
+    for start in range(0, len(missing), 100):
+        for member in await guild.query_members(user_ids=missing[start:start + 100], cache=False):
+            members[member.id] = member
+    return members
+
+async def role_members(guild, role):
+    """Membres (hors bots) portant un rôle ; télécharge la liste des membres une fois si le cache est incomplet"""
+    if guild.chunked:
+        members = role.members
+    else:
+        # Profil lean : pas de cache des membres, un seul téléchargement sans le mettre en cache
+        members = [member for member in await guild.chunk(cache=False) if member.get_role(role.id) is not None]
+    return [member for member in members if not member.bot]
+
+def is_gs_channel(interaction: discord.Interaction) -> bool:
+    """Vérifie si la commande est lancée dans un salon où une GS peut se dérouler"""
+    if interaction.guild_id is None:
+        return False
+    return not GS_CHANNEL_IDS or interaction.channel_id in GS_CHANNEL_IDS
+
+def get_session(interaction: discord.Interaction):
+    """Retourne la session GS du salon de l'interaction, ou None"""
+    return bot.sessions.get(interaction.guild_id, interaction.channel_id)
 
 def has_required_role(interaction: discord.Interaction) -> bool:
-    """Vérifie si l'utilisateur a le rôle requis"""
-    REQUIRED_ROLE_ID = 1336091937567936596
-    user_roles = [role.id for role in interaction.user.roles]
-    print(f"User roles: {user_roles}")
-    print(f"Required role: {REQUIRED_ROLE_ID}")
-    has_role = any(role.id == REQUIRED_ROLE_ID for role in interaction.user.roles)
-    print(f"Has required role: {has_role}")
-    return has_role
+    """Vérifie si l'utilisateur a le rôle officier du serveur"""
+    return bot.permissions.is_officer(interaction)
 
 @bot.tree.command(name="init_gs", description="Initialiser une nouvelle Guerre Sainte avec les joueurs mentionnés")
 @app_commands.describe(
@@ -128,6 +695,7 @@ def has_required_role(interaction: discord.Interaction) -> bool:
     joueur4="Quatrième joueur (mention)",
     joueur5="Cinquième joueur (mention)"
 )
+@bot.metrics.instrument
 async def init_gs(
     interaction: discord.Interaction,
     joueur1: discord.Member,
@@ -143,53 +711,134 @@ async def init_gs(
             await interaction.response.send_message("❌ Vous n'avez pas la permission d'utiliser cette commande.", ephemeral=True)
             return
 
-        if interaction.channel_id != GS_CHANNEL_ID:
+        if not is_gs_channel(interaction):
             await interaction.response.send_message("Cette commande ne peut être utilisée que dans le salon GS !", ephemeral=True)
             return
 
         # Collecter tous les joueurs non-None
         players = [j for j in [joueur1, joueur2, joueur3, joueur4, joueur5] if j is not None]
 
-        if len(players) > MAX_PLAYERS:
-            await interaction.response.send_message(f"Erreur: Maximum {MAX_PLAYERS} joueurs autorisés !", ephemeral=True)
+        session = bot.sessions.get_or_create(interaction.guild_id, interaction.channel_id)
+        reason = session.engine.check_roster(len(players))
+        if reason is not None:
+            await interaction.response.send_message(f"Erreur: {reason} !", ephemeral=True)
             return
 
-        # Réinitialisation des données
-        bot.gs_data['players'] = {}
-        bot.gs_data['defenses'] = {}
-        bot.gs_data['tests'] = {}
-        bot.gs_data['attacks'] = {}
-        bot.gs_data['stars'] = {}
-        bot.gs_data['message_id'] = None
-
-        # Ajout des joueurs
-        for player in players:
-            bot.gs_data['players'][player.id] = {
-                "name": player.display_name,
-                "mention": player.mention
-            }
-
-        # Créer et envoyer le message d'abord
-        message = await interaction.channel.send(embed=create_gs_embed())
+        previous_board = await start_new_war(session, [(player.id, player.display_name, player.mention) for player in players])
 
-        # Épingler le message
-        await message.pin(reason="Tableau GS")
-        bot.gs_data['message_id'] = message.id
-
-        # Répondre à l'interaction avec un message de confirmation
+        # Répondre d'abord : l'envoi et l'épinglage du tableau passent ensuite par la file sortante
         await interaction.response.send_message("✅ Guerre Sainte initialisée !", ephemeral=True)
 
-    except Exception as e:
-        print(f"Error in init_gs: {str(e)}")
+        if previous_board is not None:
+            retire_board(interaction.channel, previous_board)
+        bot.board_scheduler.request_update(interaction.channel)
+
+    except Exception:
+        log.exception("Erreur dans init_gs")
         if not interaction.response.is_done():
             await interaction.response.send_message("❌ Une erreur s'est produite lors de l'initialisation.", ephemeral=True)
 
+@bot.tree.command(name="import_gs", description="Initialiser une GS avec les joueurs d'un rôle, de la GS précédente ou d'une liste")
+@app_commands.describe(
+    role="Ajouter tous les membres de ce rôle",
+    precedente="Reprendre les joueurs de la GS précédente de ce salon",
+    liste="Mentions ou identifiants des joueurs, séparés par des espaces ou des virgules"
+)
+@bot.metrics.instrument
+async def import_gs(
+    interaction: discord.Interaction,
+    role: Optional[discord.Role] = None,
+    precedente: bool = False,
+    liste: Optional[str] = None
+):
+    """Initialise une nouvelle GS en important tout le roster d'un coup ; le tableau n'est créé qu'une fois"""
+    try:
+        if not has_required_role(interaction):
+            await interaction.response.send_message("❌ Vous n'avez pas la permission d'utiliser cette commande.", ephemeral=True)
+            return
+
+        if not is_gs_channel(interaction):
+            await interaction.response.send_message("Cette commande ne peut être utilisée que dans le salon GS !", ephemeral=True)
+            return
+
+        if role is None and not precedente and not liste:
+            await interaction.response.send_message("Indiquez au moins un rôle, une liste ou `precedente`.", ephemeral=True)
+            return
+
+        try:
+            listed = parse_roster(liste) if liste else []
+        except BulkEntryError as e:
+            await interaction.response.send_message("❌ Import refusé, aucune modification :\n" + "\n".join(e.errors[:20]), ephemeral=True)
+            return
+
+        # La résolution des membres peut prendre plus que le délai de réponse d'une interaction
+        await interaction.response.defer(ephemeral=True, thinking=True)
+        guild = interaction.guild
+        session = bot.sessions.get_or_create(interaction.guild_id, interaction.channel_id)
+
+        # Format: {user_id: nom enregistré ou None} dans l'ordre d'import, sans doublon
+        names = {}
+        resolved = {}  # Format: {user_id: discord.Member}
+        if role is not None:
+            for member in await role_members(guild, role):
+                names[member.id] = member.display_name
+                resolved[member.id] = member
+        if precedente:
+            # La GS en cours, sinon la dernière GS archivée de ce salon
+            if session.state:
+                previous = [(player.user_id, player.name) for player in session.state]
+            else:
+                previous = await bot.store.last_roster(guild.id, interaction.channel_id)
+            for user_id, name in previous:
+                names.setdefault(user_id, name)
+        for user_id in listed:
+            names.setdefault(user_id, None)
+
+        # Une seule résolution groupée pour les joueurs de la liste et de la GS précédente
+        resolved.update(await resolve_members(guild, [user_id for user_id in names if user_id not in resolved]))
+        unknown = [user_id for user_id in listed if user_id not in resolved]
+        if unknown:
+            await interaction.followup.send(
+                "❌ Import refusé, membre(s) introuvable(s) sur ce serveur : " + ", ".join(f"<@{user_id}>" for user_id in unknown[:20]),
+                ephemeral=True
+            )
+            return
+        if not names:
+            await interaction.followup.send("❌ Aucun joueur à importer.", ephemeral=True)
+            return
+        reason = session.engine.check_roster(len(names))
+        if reason is not None:
+            await interaction.followup.send(f"Erreur: {reason} !", ephemeral=True)
+            return
+
+        roster = []
+        for user_id, name in names.items():
+            member = resolved.get(user_id)
+            # Un joueur de la GS précédente qui a quitté le serveur garde son nom enregistré
+            roster.append((user_id, member.display_name if member is not None else name, f"<@{user_id}>"))
+        previous_board = await start_new_war(session, roster)
+
+        await interaction.followup.send(f"✅ Guerre Sainte initialisée avec {len(roster)} joueur(s) !", ephemeral=True)
+
+        if previous_board is not None:
+            retire_board(interaction.channel, previous_board)
+        bot.board_scheduler.request_update(interaction.channel)
+
+    except Exception:
+        log.exception("Erreur dans import_gs")
+        # Après le report, seul un message de suivi peut remplacer « réfléchit… »
+        if not interaction.response.is_done():
+            await interaction.response.send_message("❌ Une erreur s'est produite lors de l'import.", ephemeral=True)
+        else:
+            await interaction.followup.send("❌ Une erreur s'est produite lors de l'import.", ephemeral=True)
+
 @bot.tree.command(name="add_player", description="Ajouter un ou plusieurs joueurs à la GS en cours")
 @app_commands.describe(
     joueur1="Premier joueur à ajouter (mention)",
     joueur2="Deuxième joueur à ajouter (mention)",
     joueur3="Troisième joueur à ajouter (mention)"
 )
+@bot.metrics.instrument
 async def add_player(
     interaction: discord.Interaction,
     joueur1: discord.Member,
@@ -201,31 +850,34 @@ async def add_player(
             await interaction.response.send_message("❌ Vous n'avez pas la permission d'utiliser cette commande.", ephemeral=True)
             return
 
-    if interaction.channel_id != GS_CHANNEL_ID:
+    if not is_gs_channel(interaction):
         await interaction.response.send_message("Cette commande ne peut être utilisée que dans le salon GS !", ephemeral=True)
         return
 
-    if not bot.gs_data['players']:
+    session = get_session(interaction)
+
+    if session is None or not session.state:
         await interaction.response.send_message("Aucune GS n'est initialisée. Utilisez d'abord /init_gs", ephemeral=True)
         return
 
     new_players = [j for j in [joueur1, joueur2, joueur3] if j is not None]
 
-    if len(bot.gs_data['players']) + len(new_players) > MAX_PLAYERS:
-        await interaction.response.send_message(f"Erreur: Le nombre total de joueurs ne peut pas dépasser {MAX_PLAYERS} !", ephemeral=True)
+    # Tout ou rien : le roster complété doit respecter la limite du moteur
+    reason = session.engine.check_roster(len(session.state) + sum(player.id not in session.state for player in new_players))
+    if reason is not None:
+        await interaction.response.send_message(f"Erreur: {reason} !", ephemeral=True)
         return
 
     added_players = []
     already_present = []
-    for player in new_players:
-        if player.id in bot.gs_data['players']:
-            already_present.append(player.mention)
-        else:
-            bot.gs_data['players'][player.id] = {
-                "name": player.display_name,
-                "mention": player.mention
-            }
+    results = await session.apply_many([
+        ('add_player', player.id, player.display_name, player.mention) for player in new_players
+    ])
+    for player, added in zip(new_players, results):
+        if added:
             added_players.append(player.mention)
+        else:
+            already_present.append(player.mention)
 
     response = []
     if added_players:
@@ -237,14 +889,7 @@ async def add_player(
     await interaction.response.send_message("\n".join(response), ephemeral=True)
 
     # Puis mettre à jour le message épinglé
-    if bot.gs_data['message_id']:
-        try:
-            message = await interaction.channel.fetch_message(bot.gs_data['message_id'])
-            await message.edit(embed=create_gs_embed())
-        except discord.NotFound:
-            new_message = await interaction.channel.send(embed=create_gs_embed())
-            await new_message.pin(reason="Tableau GS")
-            bot.gs_data['message_id'] = new_message.id
+    bot.board_scheduler.request_update(interaction.channel)
 
 @bot.tree.command(name="remove_player", description="Retirer un ou plusieurs joueurs de la GS en cours")
 @app_commands.describe(
@@ -252,6 +897,7 @@ async def add_player(
     joueur2="Deuxième joueur à retirer (mention)",
     joueur3="Troisième joueur à retirer (mention)"
 )
+@bot.metrics.instrument
 async def remove_player(
     interaction: discord.Interaction,
     joueur1: discord.Member,
@@ -263,12 +909,14 @@ async def remove_player(
             await interaction.response.send_message("❌ Vous n'avez pas la permission d'utiliser cette commande.", ephemeral=True)
             return
 
-    if interaction.channel_id != GS_CHANNEL_ID:
+    if not is_gs_channel(interaction):
         await interaction.response.send_message("Cette commande ne peut être utilisée que dans le salon GS !", ephemeral=True)
         return
 
+    session = get_session(interaction)
+
     # Vérifier si une GS est en cours
-    if not bot.gs_data['players']:
+    if session is None or not session.state:
         await interaction.response.send_message("Aucune GS n'est initialisée. Utilisez d'abord /init_gs", ephemeral=True)
         return
 
@@ -278,13 +926,9 @@ async def remove_player(
     # Retirer les joueurs
     removed_players = []
     not_found = []
-    for player in players_to_remove:
-        if player.id in bot.gs_data['players']:
-            del bot.gs_data['players'][player.id]
-            if player.id in bot.gs_data['defenses']: del bot.gs_data['defenses'][player.id]
-            if player.id in bot.gs_data['tests']: del bot.gs_data['tests'][player.id]
-            if player.id in bot.gs_data['attacks']: del bot.gs_data['attacks'][player.id]
-            if player.id in bot.gs_data['stars']: del bot.gs_data['stars'][player.id]
+    results = await session.apply_many([('remove_player', player.id) for player in players_to_remove])
+    for player, record in zip(players_to_remove, results):
+        if record is not None:
             removed_players.append(player.mention)
         else:
             not_found.append(player.mention)
@@ -296,100 +940,143 @@ async def remove_player(
     if not_found:
         response.append(f"❌ Non trouvé(s): {', '.join(not_found)}")
 
-    await interaction.response.send_message("\n".join(response), embed=create_gs_embed())
+    # D'abord répondre à l'interaction
+    await interaction.response.send_message("\n".join(response), ephemeral=True)
+
+    # Puis mettre à jour le message épinglé
+    bot.board_scheduler.request_update(interaction.channel)
 
 @bot.tree.command(name="def", description="Définir une défense (1-20)")
+@bot.metrics.instrument
 async def defense(interaction: discord.Interaction, target: int):
     """Enregistre une défense pour un joueur"""
-    if interaction.channel_id != GS_CHANNEL_ID:
+    if not is_gs_channel(interaction):
         await interaction.response.send_message("Cette commande ne peut être utilisée que dans le salon GS !", ephemeral=True)
         return
 
-    if interaction.user.id not in bot.gs_data['players']:
+    session = get_session(interaction)
+
+    if session is None or interaction.user.id not in session.state:
         await interaction.response.send_message(
             f"{interaction.user.mention} vous n'êtes pas dans la liste des joueurs GS !",
             ephemeral=True
         )
         return
 
-    # Vérifier que la valeur est entre 1 et 20
-    if target < 1 or target > 20:
+    # Vérifier la cible avec les règles du moteur (valeur entre 1 et 20)
+    op = ('set', interaction.user.id, 'defense', target)
+    reason = session.engine.check(op)
+    if reason is not None:
+        await interaction.response.send_message(f"❌ {reason} !", ephemeral=True)
+        return
+
+    # Enregistrer la défense
+    if not await session.apply(op):
+        # Retiré de la GS entre la vérification et l'application
         await interaction.response.send_message(
-            f"❌ La valeur doit être comprise entre 1 et 20 !",
+            f"{interaction.user.mention} vous n'êtes pas dans la liste des joueurs GS !",
             ephemeral=True
         )
         return
 
-    # Enregistrer la défense
-    bot.gs_data['defenses'][interaction.user.id] = target
+    # D'abord répondre à l'interaction avec un message éphémère (avec un avertissement si la cible est déjà prise)
+    note = target_conflict_note(session, 'defense', interaction.user.id, target)
+    await interaction.response.send_message(f"✅ Défense {target} enregistrée.{note}", ephemeral=True)
 
-    # D'abord répondre à l'interaction avec un message éphémère
-    await interaction.response.send_message(f"✅ Défense {target} enregistrée.", ephemeral=True)
+    # Ensuite planifier la mise à jour du tableau épinglé
+    bot.board_scheduler.request_update(interaction.channel)
 
-    # Ensuite mettre à jour le message avec update_gs_message
-    await update_gs_message(interaction.channel)
+@defense.autocomplete('target')
+async def defense_target_autocomplete(interaction: discord.Interaction, current: str):
+    return target_choices(interaction, 'defense', current)
 
 @bot.tree.command(name="test", description="Définir un test (1-20)")
+@bot.metrics.instrument
 async def test(interaction: discord.Interaction, target: int):
     """Enregistre un test pour un joueur"""
-    if interaction.channel_id != GS_CHANNEL_ID:
+    if not is_gs_channel(interaction):
         await interaction.response.send_message("Cette commande ne peut être utilisée que dans le salon GS !", ephemeral=True)
         return
 
-    if interaction.user.id not in bot.gs_data['players']:
+    session = get_session(interaction)
+
+    if session is None or interaction.user.id not in session.state:
         await interaction.response.send_message(
             f"{interaction.user.mention} vous n'êtes pas dans la liste des joueurs GS !",
             ephemeral=True
         )
         return
 
-    # Vérifier que la valeur est entre 1 et 20
-    if target < 1 or target > 20:
+    # Vérifier la cible avec les règles du moteur (valeur entre 1 et 20)
+    op = ('set', interaction.user.id, 'test', target)
+    reason = session.engine.check(op)
+    if reason is not None:
+        await interaction.response.send_message(f"❌ {reason} !", ephemeral=True)
+        return
+
+    # Enregistrer le test
+    if not await session.apply(op):
+        # Retiré de la GS entre la vérification et l'application
         await interaction.response.send_message(
-            f"❌ La valeur doit être comprise entre 1 et 20 !",
+            f"{interaction.user.mention} vous n'êtes pas dans la liste des joueurs GS !",
             ephemeral=True
         )
         return
 
-    # Enregistrer le test
-    bot.gs_data['tests'][interaction.user.id] = target
+    # D'abord répondre à l'interaction avec un message éphémère (avec un avertissement si la cible est déjà prise)
+    note = target_conflict_note(session, 'test', interaction.user.id, target)
+    await interaction.response.send_message(f"✅ Test {target} enregistré.{note}", ephemeral=True)
 
-    # D'abord répondre à l'interaction avec un message éphémère
-    await interaction.response.send_message(f"✅ Test {target} enregistré.", ephemeral=True)
+    # Ensuite planifier la mise à jour du tableau épinglé
+    bot.board_scheduler.request_update(interaction.channel)
 
-    # Ensuite mettre à jour le message avec update_gs_message
-    await update_gs_message(interaction.channel)
+@test.autocomplete('target')
+async def test_target_autocomplete(interaction: discord.Interaction, current: str):
+    return target_choices(interaction, 'test', current)
 
 @bot.tree.command(name="atq", description="Définir une attaque (1-20)")
+@bot.metrics.instrument
 async def attack(interaction: discord.Interaction, target: int):
     """Enregistre une attaque pour un joueur"""
-    if interaction.channel_id != GS_CHANNEL_ID:
+    if not is_gs_channel(interaction):
         await interaction.response.send_message("Cette commande ne peut être utilisée que dans le salon GS !", ephemeral=True)
         return
 
-    if interaction.user.id not in bot.gs_data['players']:
+    session = get_session(interaction)
+
+    if session is None or interaction.user.id not in session.state:
         await interaction.response.send_message(
             f"{interaction.user.mention} vous n'êtes pas dans la liste des joueurs GS !",
             ephemeral=True
         )
         return
 
-    # Vérifier que la valeur est entre 1 et 20
-    if target < 1 or target > 20:
+    # Vérifier la cible avec les règles du moteur (valeur entre 1 et 20)
+    op = ('set', interaction.user.id, 'attack', target)
+    reason = session.engine.check(op)
+    if reason is not None:
+        await interaction.response.send_message(f"❌ {reason} !", ephemeral=True)
+        return
+
+    # Enregistrer l'attaque
+    if not await session.apply(op):
+        # Retiré de la GS entre la vérification et l'application
         await interaction.response.send_message(
-            f"❌ La valeur doit être comprise entre 1 et 20 !",
+            f"{interaction.user.mention} vous n'êtes pas dans la liste des joueurs GS !",
             ephemeral=True
         )
         return
 
-    # Enregistrer l'attaque
-    bot.gs_data['attacks'][interaction.user.id] = target
+    # D'abord répondre à l'interaction avec un message éphémère (avec un avertissement si la cible est déjà prise)
+    note = target_conflict_note(session, 'attack', interaction.user.id, target)
+    await interaction.response.send_message(f"✅ Attaque {target} enregistrée.{note}", ephemeral=True)
 
-    # D'abord répondre à l'interaction avec un message éphémère
-    await interaction.response.send_message(f"✅ Attaque {target} enregistrée.", ephemeral=True)
+    # Ensuite planifier la mise à jour du tableau épinglé
+    bot.board_scheduler.request_update(interaction.channel)
 
-    # Ensuite mettre à jour le message avec update_gs_message
-    await update_gs_message(interaction.channel)
+@attack.autocomplete('target')
+async def attack_target_autocomplete(interaction: discord.Interaction, current: str):
+    return target_choices(interaction, 'attack', current)
 
 @bot.tree.command(name="reset_player", description="Réinitialiser une action spécifique d'un joueur")
 @app_commands.describe(
@@ -402,21 +1089,24 @@ async def attack(interaction: discord.Interaction, target: int):
     app_commands.Choice(name="Attaque", value="attack"),
     app_commands.Choice(name="Tout", value="all")
 ])
+@bot.metrics.instrument
 async def reset_player(
     interaction: discord.Interaction,
     joueur: discord.Member,
     action: app_commands.Choice[str]
 ):
     """Réinitialise une ou toutes les actions d'un joueur"""
-    if interaction.channel_id != GS_CHANNEL_ID:
+    if not is_gs_channel(interaction):
         await interaction.response.send_message("Cette commande ne peut être utilisée que dans le salon GS !", ephemeral=True)
         return
 
-    if not bot.gs_data['players']:
+    session = get_session(interaction)
+
+    if session is None or not session.state:
         await interaction.response.send_message("Aucune GS n'est initialisée. Utilisez d'abord /init_gs", ephemeral=True)
         return
 
-    if joueur.id not in bot.gs_data['players']:
+    if joueur.id not in session.state:
         await interaction.response.send_message(f"❌ {joueur.mention} n'est pas dans la liste des joueurs GS !", ephemeral=True)
         return
 
@@ -425,25 +1115,20 @@ async def reset_player(
     message = ""
 
     if action_value == "all":
-        if joueur.id in bot.gs_data['defenses']: del bot.gs_data['defenses'][joueur.id]
-        if joueur.id in bot.gs_data['tests']: del bot.gs_data['tests'][joueur.id]
-        if joueur.id in bot.gs_data['attacks']: del bot.gs_data['attacks'][joueur.id]
+        await session.apply(('reset_player', joueur.id))
         message = f"✅ Toutes les actions de {joueur.mention} ont été réinitialisées."
     elif action_value == "defense":
-        if joueur.id in bot.gs_data['defenses']:
-            del bot.gs_data['defenses'][joueur.id]
+        if await session.apply(('clear', joueur.id, 'defense')):
             message = f"✅ La défense de {joueur.mention} a été réinitialisée."
         else:
             message = f"ℹ️ {joueur.mention} n'avait pas de défense enregistrée."
     elif action_value == "test":
-        if joueur.id in bot.gs_data['tests']:
-            del bot.gs_data['tests'][joueur.id]
+        if await session.apply(('clear', joueur.id, 'test')):
             message = f"✅ Le test de {joueur.mention} a été réinitialisé."
         else:
             message = f"ℹ️ {joueur.mention} n'avait pas de test enregistré."
     elif action_value == "attack":
-        if joueur.id in bot.gs_data['attacks']:
-            del bot.gs_data['attacks'][joueur.id]
+        if await session.apply(('clear', joueur.id, 'attack')):
             message = f"✅ L'attaque de {joueur.mention} a été réinitialisée."
         else:
             message = f"ℹ️ {joueur.mention} n'avait pas d'attaque enregistrée."
@@ -452,35 +1137,28 @@ async def reset_player(
     await interaction.response.send_message(message, ephemeral=True)
 
     # Puis mettre à jour le message épinglé
-    await update_gs_message(interaction.channel)
+    bot.board_scheduler.request_update(interaction.channel)
 
 @bot.tree.command(name="reset_all_actions", description="Réinitialiser toutes les actions de tous les joueurs")
+@bot.metrics.instrument
 async def reset_all_actions(interaction: discord.Interaction):
     """Réinitialise toutes les actions tout en gardant la liste des joueurs"""
     if not has_required_role(interaction):
             await interaction.response.send_message("❌ Vous n'avez pas la permission d'utiliser cette commande.", ephemeral=True)
             return
 
-    if interaction.channel_id != GS_CHANNEL_ID:
+    if not is_gs_channel(interaction):
         await interaction.response.send_message("Cette commande ne peut être utilisée que dans le salon GS !", ephemeral=True)
         return
 
-    if not bot.gs_data['players']:
+    session = get_session(interaction)
+
+    if session is None or not session.state:
         await interaction.response.send_message("Aucune GS n'est initialisée. Utilisez d'abord /init_gs", ephemeral=True)
         return
 
     # Garder la liste des joueurs et message_id mais réinitialiser toutes les actions
-    players_backup = bot.gs_data['players'].copy()
-    message_id_backup = bot.gs_data['message_id']
-
-    # Réinitialiser les actions
-    bot.gs_data['defenses'] = {}
-    bot.gs_data['tests'] = {}
-    bot.gs_data['attacks'] = {}
-
-    # Restaurer la liste des joueurs et message_id
-    bot.gs_data['players'] = players_backup
-    bot.gs_data['message_id'] = message_id_backup
+    await session.apply(('reset_actions',))
 
     # D'abord répondre à l'interaction
     await interaction.response.send_message(
@@ -489,7 +1167,7 @@ async def reset_all_actions(interaction: discord.Interaction):
     )
 
     # Puis mettre à jour le message épinglé
-    await update_gs_message(interaction.channel)
+    bot.board_scheduler.request_update(interaction.channel)
 
 @bot.tree.command(name="add_star", description="Ajouter des étoiles à un participant")
 @app_commands.describe(
@@ -501,6 +1179,7 @@ async def reset_all_actions(interaction: discord.Interaction):
     app_commands.Choice(name="2 étoiles", value=2),
     app_commands.Choice(name="3 étoiles", value=3)
 ])
+@bot.metrics.instrument
 async def add_star(
     interaction: discord.Interaction,
     joueur: discord.Member,
@@ -512,29 +1191,123 @@ async def add_star(
         await interaction.response.send_message("❌ Vous n'avez pas la permission d'utiliser cette commande.", ephemeral=True)
         return
 
-    if interaction.channel_id != GS_CHANNEL_ID:
+    if not is_gs_channel(interaction):
         await interaction.response.send_message("Cette commande ne peut être utilisée que dans le salon GS !", ephemeral=True)
         return
 
-    if not bot.gs_data['players']:
+    session = get_session(interaction)
+
+    if session is None or not session.state:
         await interaction.response.send_message("Aucune GS n'est initialisée. Utilisez d'abord /init_gs", ephemeral=True)
         return
 
-    if joueur.id not in bot.gs_data['players']:
+    if joueur.id not in session.state:
         await interaction.response.send_message(f"❌ {joueur.mention} n'est pas dans la liste des joueurs GS !", ephemeral=True)
         return
 
     # Ajouter les étoiles
-    bot.gs_data['stars'][joueur.id] = nombre.value
+    await session.apply(('set', joueur.id, 'stars', nombre.value))
 
     # Répondre et mettre à jour le tableau
     await interaction.response.send_message(
         f"✅ {nombre.value} étoile(s) {'a' if nombre.value == 1 else 'ont'} été ajoutée(s) à {joueur.mention}.",
         ephemeral=True
     )
-    await update_gs_message(interaction.channel)
+    bot.board_scheduler.request_update(interaction.channel)
+
+class BulkEntryModal(discord.ui.Modal, title="Saisie groupée"):
+    """Formulaire de /bulk quand aucune saisie n'est passée en option"""
+
+    entries = discord.ui.TextInput(
+        label="Une entrée par ligne ou séparées par ;",
+        style=discord.TextStyle.paragraph,
+        placeholder="@joueur d3 t5 a7 e2; @autre d1 a-",
+        max_length=4000
+    )
+
+    async def on_submit(self, interaction: discord.Interaction):
+        with bot.metrics.track('bulk'):
+            await apply_bulk_entries(interaction, self.entries.value, parse_text)
+
+async def apply_bulk_entries(interaction: discord.Interaction, content: str, parse):
+    """Valide toute la saisie puis l'applique d'un bloc, avec une seule mise à jour du tableau"""
+    session = get_session(interaction)
+
+    if session is None or not session.state:
+        await interaction.response.send_message("Aucune GS n'est initialisée. Utilisez d'abord /init_gs", ephemeral=True)
+        return
+
+    try:
+        entries = parse(content)
+    except BulkEntryError as e:
+        errors = e.errors
+    else:
+        errors = [f"❌ <@{user_id}> n'est pas dans la liste des joueurs GS !" for user_id, _ in entries if user_id not in session.state]
+    if not errors and not entries:
+        errors = ["Aucune entrée à appliquer."]
+    if errors:
+        # Rien n'est appliqué tant qu'une seule entrée est invalide
+        report = "\n".join(errors[:20])
+        if len(errors) > 20:
+            report += f"\n… et {len(errors) - 20} autre(s) erreur(s)"
+        await interaction.response.send_message(f"❌ Saisie refusée, aucune modification :\n{report}", ephemeral=True)
+        return
+
+    # Un seul bloc pour l'acteur : aucune autre mutation ne s'intercale dans la saisie
+    # Les valeurs identiques à l'existant ne sont pas renvoyées : elles ne comptent pas comme enregistrées
+    ops = [
+        ('set', user_id, field, value) if value else ('clear', user_id, field)
+        for user_id, changes in entries
+        for field, value in changes.items()
+        if not value or getattr(session.state.get(user_id), field) != value
+    ]
+    # clear retourne False s'il n'y avait rien à effacer, None pour une mutation rejetée
+    changed = sum(bool(result) for result in await session.apply_many(ops))
+
+    players = len({user_id for user_id, _ in entries})
+    await interaction.response.send_message(
+        f"✅ {changed} valeur(s) enregistrée(s) pour {players} joueur(s).",
+        ephemeral=True
+    )
+    bot.board_scheduler.request_update(interaction.channel)
+
+@bot.tree.command(name="bulk", description="Saisir les actions de plusieurs joueurs en une seule fois")
+@app_commands.describe(
+    saisie="Ex. : @joueur d3 t5 a7 e2; @autre d1 a- (sans saisie ni fichier, un formulaire s'ouvre)",
+    fichier="Fichier CSV : joueur,def,test,atq,etoiles (cellule vide = inchangé, - = effacer)"
+)
+@bot.metrics.instrument
+async def bulk(
+    interaction: discord.Interaction,
+    saisie: Optional[str] = None,
+    fichier: Optional[discord.Attachment] = None
+):
+    """Enregistre les actions et étoiles de plusieurs joueurs en une interaction"""
+    if not has_required_role(interaction):
+        await interaction.response.send_message("❌ Vous n'avez pas la permission d'utiliser cette commande.", ephemeral=True)
+        return
+
+    if not is_gs_channel(interaction):
+        await interaction.response.send_message("Cette commande ne peut être utilisée que dans le salon GS !", ephemeral=True)
+        return
+
+    if fichier is not None:
+        if fichier.size > BULK_MAX_FILE_SIZE:
+            await interaction.response.send_message("❌ Fichier trop volumineux (64 Ko maximum).", ephemeral=True)
+            return
+        try:
+            content = (await fichier.read()).decode('utf-8-sig')
+        except (discord.HTTPException, UnicodeDecodeError):
+            await interaction.response.send_message("❌ Impossible de lire le fichier (CSV UTF-8 attendu).", ephemeral=True)
+            return
+        await apply_bulk_entries(interaction, content, parse_csv)
+    elif saisie:
+        await apply_bulk_entries(interaction, saisie, parse_text)
+    else:
+        await interaction.response.send_modal(BulkEntryModal())
 
 @bot.tree.command(name="gg", description="Féliciter les participants avec 3 étoiles")
+@bot.metrics.instrument
 async def congratulate(interaction: discord.Interaction):
     """Félicite les participants avec 3 étoiles et remercie tout le monde"""
     # Vérification du rôle
@@ -542,20 +1315,18 @@ async def congratulate(interaction: discord.Interaction):
         await interaction.response.send_message("❌ Vous n'avez pas la permission d'utiliser cette commande.", ephemeral=True)
         return
 
-    if interaction.channel_id != GS_CHANNEL_ID:
+    if not is_gs_channel(interaction):
         await interaction.response.send_message("Cette commande ne peut être utilisée que dans le salon GS !", ephemeral=True)
         return
 
-    if not bot.gs_data['players']:
+    session = get_session(interaction)
+
+    if session is None or not session.state:
         await interaction.response.send_message("Aucune GS n'est initialisée. Utilisez d'abord /init_gs", ephemeral=True)
         return
 
     # Trouver les participants avec 3 étoiles
-    three_stars = [
-        bot.gs_data['players'][user_id]['mention']
-        for user_id in bot.gs_data['players']
-        if bot.gs_data['stars'].get(user_id, 0) >= 3
-    ]
+    three_stars = [player.mention for player in session.state if player.stars >= 3]
 
     # Créer le message de félicitations
     embed = discord.Embed(
@@ -572,7 +1343,7 @@ async def congratulate(interaction: discord.Interaction):
         )
 
     # Remercier tous les participants
-    all_participants = [info['mention'] for info in bot.gs_data['players'].values()]
+    all_participants = [player.mention for player in session.state]
     embed.add_field(
         name="👏 Merci à tous les participants !",
         value=f"Un grand merci à tous pour votre participation :\n{', '.join(all_participants)}",
@@ -582,17 +1353,20 @@ async def congratulate(interaction: discord.Interaction):
     await interaction.response.send_message(embed=embed)
 
 @bot.tree.command(name="check_actions", description="Voir qui n'a pas encore effectué toutes ses actions")
+@bot.metrics.instrument
 async def check_actions(interaction: discord.Interaction):
     """Affiche un résumé des actions manquantes pour chaque joueur"""
     if not has_required_role(interaction):
             await interaction.response.send_message("❌ Vous n'avez pas la permission d'utiliser cette commande.", ephemeral=True)
             return
 
-    if interaction.channel_id != GS_CHANNEL_ID:
+    if not is_gs_channel(interaction):
         await interaction.response.send_message("Cette commande ne peut être utilisée que dans le salon GS !", ephemeral=True)
         return
 
-    if not bot.gs_data['players']:
+    session = get_session(interaction)
+
+    if session is None or not session.state:
         await interaction.response.send_message("Aucune GS n'est initialisée. Utilisez d'abord /init_gs", ephemeral=True)
         return
 
@@ -603,25 +1377,12 @@ async def check_actions(interaction: discord.Interaction):
         timestamp=datetime.datetime.now()
     )
 
-    # Vérifier les actions manquantes pour chaque joueur
-    missing_def = []
-    missing_test = []
-    missing_atq = []
-    all_done = []
-
-    for user_id, player_info in bot.gs_data['players'].items():
-        missing = []
-        if user_id not in bot.gs_data['defenses']: missing.append("Défense")
-        if user_id not in bot.gs_data['tests']: missing.append("Test")
-        if user_id not in bot.gs_data['attacks']: missing.append("Attaque")
-
-        if missing:
-            actions = ", ".join(missing)
-            if "Défense" in actions: missing_def.append(player_info['mention'])
-            if "Test" in actions: missing_test.append(player_info['mention'])
-            if "Attaque" in actions: missing_atq.append(player_info['mention'])
-        else:
-            all_done.append(player_info['mention'])
+    # Vérifier les actions manquantes pour chaque joueur, en un seul passage
+    missing, completed = session.state.missing_actions()
+    missing_def = [player.mention for player in missing['defense']]
+    missing_test = [player.mention for player in missing['test']]
+    missing_atq = [player.mention for player in missing['attack']]
+    all_done = [player.mention for player in completed]
 
     # Ajouter les champs au embed
     if missing_def:
@@ -635,13 +1396,278 @@ async def check_actions(interaction: discord.Interaction):
 
     await interaction.response.send_message(embed=embed)
 
+@bot.tree.command(name="set_deadline", description="Définir la fin de la GS et programmer les rappels des actions manquantes")
+@app_commands.describe(
+    fin="Temps restant avant la fin de la GS (ex. : 2j, 5h30, 45m)",
+    rappels="Rappels avant la fin, séparés par des virgules (ex. : 6h,1h)"
+)
+@bot.metrics.instrument
+async def set_deadline(interaction: discord.Interaction, fin: str, rappels: Optional[str] = None):
+    """Fixe l'échéance de la GS ; les joueurs ayant des actions manquantes seront rappelés"""
+    if not has_required_role(interaction):
+        await interaction.response.send_message("❌ Vous n'avez pas la permission d'utiliser cette commande.", ephemeral=True)
+        return
+
+    if not is_gs_channel(interaction):
+        await interaction.response.send_message("Cette commande ne peut être utilisée que dans le salon GS !", ephemeral=True)
+        return
+
+    session = get_session(interaction)
+
+    if session is None or not session.state:
+        await interaction.response.send_message("Aucune GS n'est initialisée. Utilisez d'abord /init_gs", ephemeral=True)
+        return
+
+    remaining = parse_duration(fin)
+    offsets = parse_offsets(rappels) if rappels else REMINDER_OFFSETS
+    if not remaining or offsets is None:
+        await interaction.response.send_message("❌ Durée invalide (ex. : 2j, 5h30, 45m).", ephemeral=True)
+        return
+
+    deadline = time.time() + remaining
+    offsets = [offset for offset in offsets if offset < remaining]
+    await session.apply(('deadline', deadline, offsets))
+    bot.reminders.schedule(session.key, deadline, offsets)
+
+    end = datetime.datetime.fromtimestamp(deadline, tz=datetime.timezone.utc)
+    planned = ", ".join(format_duration(offset) for offset in offsets) or "aucun"
+    await interaction.response.send_message(
+        f"✅ Fin de la GS {discord.utils.format_dt(end, 'f')} ({discord.utils.format_dt(end, 'R')}). Rappels : {planned} avant la fin.",
+        ephemeral=True
+    )
+
+@bot.tree.command(name="close_gs", description="Clôturer la GS en cours et l'archiver dans l'historique")
+@bot.metrics.instrument
+async def close_gs(interaction: discord.Interaction):
+    """Archive la GS du salon (historique et statistiques des joueurs) puis la clôture"""
+    if not has_required_role(interaction):
+        await interaction.response.send_message("❌ Vous n'avez pas la permission d'utiliser cette commande.", ephemeral=True)
+        return
+
+    if not is_gs_channel(interaction):
+        await interaction.response.send_message("Cette commande ne peut être utilisée que dans le salon GS !", ephemeral=True)
+        return
+
+    session = get_session(interaction)
+
+    if session is None or not session.state:
+        await interaction.response.send_message("Aucune GS n'est initialisée. Utilisez d'abord /init_gs", ephemeral=True)
+        return
+
+    _, completed = session.state.missing_actions()
+    player_count = len(session.state)
+    board = session.state.message_id
+
+    # L'archive est écrite avec le journal, dans la même transaction que la remise à zéro
+    bot.reminders.cancel(session.key)
+    await session.apply_many([('archive', time.time()), ('init', [])])
+
+    await interaction.response.send_message(
+        f"✅ GS clôturée et archivée : {player_count} participant(s), {len(completed)} avec toutes leurs actions.",
+        ephemeral=True
+    )
+
+    if board is not None:
+        retire_board(interaction.channel, board)
+
+@bot.tree.command(name="history", description="Voir les dernières Guerres Saintes archivées")
+@bot.metrics.instrument
+async def history(interaction: discord.Interaction):
+    """Affiche les dernières GS archivées du serveur"""
+    if interaction.guild_id is None:
+        await interaction.response.send_message("Cette commande ne peut être utilisée que sur un serveur !", ephemeral=True)
+        return
+
+    wars = await bot.store.recent_wars(interaction.guild_id)
+
+    if not wars:
+        await interaction.response.send_message("Aucune GS archivée pour le moment.", ephemeral=True)
+        return
+
+    embed = discord.Embed(
+        title="📜 Historique des Guerres Saintes",
+        color=discord.Color.purple(),
+        timestamp=datetime.datetime.now()
+    )
+    for war in wars:
+        closed_at = datetime.datetime.fromtimestamp(war['closed_at'], tz=datetime.timezone.utc)
+        embed.add_field(
+            name=f"GS #{war['war_id']} · {discord.utils.format_dt(closed_at, 'd')}",
+            value=(
+                f"<#{war['channel_id']}> · {war['players']} participant(s)\n"
+                f"✅ Actions complètes : {war['completed']}/{war['players']}\n"
+                f"⭐ {war['stars']} étoile(s) · 3 étoiles : {war['three_stars']}"
+            ),
+            inline=False
+        )
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@bot.tree.command(name="player_stats", description="Voir les statistiques d'un joueur sur les GS archivées")
+@app_commands.describe(joueur="Joueur à consulter (vous-même par défaut)")
+@bot.metrics.instrument
+async def player_stats(interaction: discord.Interaction, joueur: Optional[discord.Member] = None):
+    """Affiche les agrégats d'un joueur sur toutes les GS archivées du serveur"""
+    if interaction.guild_id is None:
+        await interaction.response.send_message("Cette commande ne peut être utilisée que sur un serveur !", ephemeral=True)
+        return
+
+    member = joueur or interaction.user
+    stats = await bot.store.player_stats(interaction.guild_id, member.id)
+
+    if stats is None:
+        await interaction.response.send_message(f"{member.mention} n'a participé à aucune GS archivée.", ephemeral=True)
+        return
+
+    embed = discord.Embed(
+        title=f"📊 Statistiques de {member.display_name}",
+        color=discord.Color.green(),
+        timestamp=datetime.datetime.now()
+    )
+    embed.add_field(name="GS jouées", value=str(stats['wars']), inline=True)
+    embed.add_field(name="Actions complètes", value=f"{stats['completion_rate']:.0%} des GS", inline=True)
+    embed.add_field(name="Actions effectuées", value=f"{stats['action_rate']:.0%}", inline=True)
+    embed.add_field(name="Étoiles moyennes", value=f"{stats['average_stars']:.2f}", inline=True)
+    embed.add_field(
+        name="Répartition des étoiles",
+        value=" · ".join(f"{'⭐' * n or '0'} : {count}" for n, count in enumerate(stats['star_distribution'])),
+        inline=False
+    )
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@bot.tree.command(name="gs_stats", description="Voir les latences des commandes et les appels à l'API Discord")
+@bot.metrics.instrument
+async def gs_stats(interaction: discord.Interaction):
+    """Affiche les latences et les appels REST mesurés pour chaque commande"""
+    if not has_required_role(interaction):
+        await interaction.response.send_message("❌ Vous n'avez pas la permission d'utiliser cette commande.", ephemeral=True)
+        return
+
+    embed = discord.Embed(
+        title="📈 Statistiques du bot",
+        description="Latences p50/p95 sur les derniers appels et requêtes à l'API Discord",
+        color=discord.Color.dark_grey(),
+        timestamp=datetime.datetime.now()
+    )
+
+    # Un embed est limité à 25 champs
+    for name, row in list(bot.metrics.summary().items())[:25]:
+        if row['ack_p50_ms'] is not None:
+            ack = f"{row['ack_p50_ms']:.1f} / {row['ack_p95_ms']:.1f} ms"
+        else:
+            ack = "-"
+        embed.add_field(
+            name=f"{name} ({row['count']})",
+            value=(
+                f"Réponse : {ack}\n"
+                f"Total : {row['total_p50_ms']:.1f} / {row['total_p95_ms']:.1f} ms\n"
+                f"REST : {row['rest_calls']} · retries : {row['retries']} · 429 : {row['rate_limited']}"
+            ),
+            inline=True
+        )
+
+    board = bot.board_messages.stats()
+    outbox = bot.outbox.stats()
+    embed.set_footer(text=(
+        f"Tableau : {board['hits']} éditions directes, {board['misses']} recréations · "
+        f"File sortante : {outbox['pending']} en attente, {outbox['sent']} envoyés, {outbox['deferred']} reportés"
+    ))
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
+@bot.tree.command(name="gs_profile", description="Voir le retard de la boucle et activer le profilage des handlers lents")
+@app_commands.describe(actif="Activer ou désactiver l'écriture des profils (laisser vide pour seulement consulter)")
+@bot.metrics.instrument
+async def gs_profile(interaction: discord.Interaction, actif: Optional[bool] = None):
+    """Affiche le retard de la boucle d'événements et les handlers qui la bloquent ; active le profilage"""
+    if not has_required_role(interaction):
+        await interaction.response.send_message("❌ Vous n'avez pas la permission d'utiliser cette commande.", ephemeral=True)
+        return
+
+    watchdog = bot.watchdog
+    if actif is not None:
+        watchdog.profiling = actif
+        log.info("Profilage des handlers lents %s par %s", "activé" if actif else "désactivé", interaction.user)
+
+    p50, p95 = watchdog.lag.percentile_ms(0.50), watchdog.lag.percentile_ms(0.95)
+    embed = discord.Embed(
+        title="🩺 Boucle d'événements",
+        description=(
+            f"Retard : {p50 or 0:.1f} / {p95 or 0:.1f} ms (p50/p95), max {watchdog.max_lag * 1000:.0f} ms\n"
+            f"Seuil : {watchdog.threshold * 1000:.0f} ms · blocages capturés : {len(watchdog.stalls)}\n"
+            f"Profilage : {'✅ activé' if watchdog.profiling else '❌ désactivé'} (`{watchdog.profile_dir}`)"
+        ),
+        color=discord.Color.dark_grey(),
+        timestamp=datetime.datetime.now()
+    )
+    worst = watchdog.worst_handlers()
+    for name, stats in worst:
+        embed.add_field(
+            name=name,
+            value=f"Pire étape : {stats.worst * 1000:.0f} ms\nLents : {stats.slow}/{stats.calls}",
+            inline=True
+        )
+    if not worst:
+        embed.add_field(name="Handlers", value="Aucun handler n'a dépassé le seuil", inline=False)
+    await interaction.response.send_message(embed=embed, ephemeral=True)
+
 @bot.event
 async def on_ready():
-    print(f'Bot connecté en tant que {bot.user}')
-    try:
-        synced = await bot.tree.sync()
-        print(f"Commandes slash synchronisées : {len(synced)} commandes")
-    except Exception as e:
-        print(f"Erreur lors de la synchronisation des commandes : {e}")
+    log.info("Bot connecté en tant que %s", bot.user)
+
+    # Se rattacher aux tableaux épinglés restaurés depuis le journal
+    for session in bot.sessions:
+        channel = bot.get_channel(session.channel_id)
+        if channel is not None and session.state.message_ids:
+            bot.board_scheduler.request_update(channel)
+
+    # on_ready est rappelé à chaque reconnexion : le rapport n'est affiché qu'au premier démarrage
+    if 'cache prêt' not in bot.startup_phases:
+        bot.mark_startup('cache prêt')
+        report = bot.startup_report()
+        phases = ", ".join(f"{phase} {elapsed:.2f}s" for phase, elapsed in report['phases'].items())
+        log.info("Démarrage (temps depuis le lancement) : %s", phases, extra={'fields': {
+            key: value for key, value in report.items() if key != 'phases'
+        }})
+        if READY_REPORT_PATH:
+            with open(READY_REPORT_PATH, 'w') as f:
+                json.dump(report, f)
+        if EXIT_ON_READY:
+            await bot.close()
+
+@bot.event
+async def on_member_update(before: discord.Member, after: discord.Member):
+    if before.roles != after.roles:
+        bot.permissions.invalidate_member(after.guild.id, after.id)
 
-bot.run(TOKEN)
\ No newline at end of file
+@bot.event
+async def on_guild_role_update(before: discord.Role, after: discord.Role):
+    bot.permissions.invalidate_guild(after.guild.id)
+
+@bot.event
+async def on_guild_role_delete(role: discord.Role):
+    bot.permissions.invalidate_guild(role.guild.id)
+
+bot.mark_startup('commandes')
+
+def enable_speed_mode():
+    """Installe uvloop si disponible ; discord.py utilise orjson de lui-même dès qu'il est installé"""
+    try:
+        import uvloop
+    except ImportError:
+        log.warning("SPEED_MODE : uvloop n'est pas installé, boucle asyncio standard")
+    else:
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    if not discord.utils.HAS_ORJSON:
+        log.warning("SPEED_MODE : orjson n'est pas installé, JSON de la bibliothèque standard")
+
+def main():
+    listener = setup_logging()
+    try:
+        if SPEED_MODE:
+            enable_speed_mode()
+        # Les logs de discord.py passent aussi par la file (pas de handler bloquant sur stdout)
+        bot.run(TOKEN, log_handler=None)
+    finally:
+        listener.stop()
+
+if __name__ == '__main__':
+    main()
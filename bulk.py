@@ -0,0 +1,117 @@
+import csv
+import io
+import re
+
+from engine import VALUE_RANGES
+from models import UNSET
+
+# Lettre de la grammaire -> champ du PlayerRecord (e/s : étoiles)
+FIELD_LETTERS = {'d': 'defense', 't': 'test', 'a': 'attack', 'e': 'stars', 's': 'stars'}
+# Colonnes du CSV après la colonne joueur
+CSV_FIELDS = ('defense', 'test', 'attack', 'stars')
+
+PLAYER_RE = re.compile(r"<@!?(\d+)>|(\d{15,20})")
+TOKEN_RE = re.compile(r"([dtaes])(\d+|-)", re.IGNORECASE)
+
+
+class BulkEntryError(ValueError):
+    """Saisie groupée invalide ; `errors` liste toutes les erreurs trouvées"""
+
+    def __init__(self, errors):
+        super().__init__("\n".join(errors))
+        self.errors = errors
+
+
+def parse_player(raw):
+    match = PLAYER_RE.fullmatch(raw.strip())
+    if match is None:
+        return None
+    return int(match.group(1) or match.group(2))
+
+
+def parse_value(field, raw):
+    """Convertit une valeur saisie ; '-' efface l'action"""
+    raw = raw.strip()
+    if raw == '-':
+        return UNSET
+    low, high = VALUE_RANGES[field]
+    if not raw.isdigit() or not low <= int(raw) <= high:
+        raise ValueError(f"valeur `{raw}` invalide (attendu {low}-{high} ou -)")
+    return int(raw)
+
+
+def parse_text(text):
+    """Lit une saisie `@joueur d3 t5 a7 e2; @autre d1 ...` en [(user_id, {champ: valeur})]"""
+    entries = []
+    errors = []
+    for number, chunk in enumerate(re.split(r"[;\n]", text), 1):
+        chunk = chunk.strip()
+        if not chunk:
+            continue
+        head, *tokens = chunk.split()
+        user_id = parse_player(head)
+        if user_id is None:
+            errors.append(f"Entrée {number} : joueur `{head}` non reconnu")
+            continue
+        changes = {}
+        for token in tokens:
+            match = TOKEN_RE.fullmatch(token)
+            if match is None:
+                errors.append(f"Entrée {number} : `{token}` non reconnu (ex. d3, t5, a7, e2, d-)")
+                continue
+            field = FIELD_LETTERS[match.group(1).lower()]
+            try:
+                changes[field] = parse_value(field, match.group(2))
+            except ValueError as e:
+                errors.append(f"Entrée {number} : {e}")
+        if not changes and not tokens:
+            errors.append(f"Entrée {number} : aucune action pour `{head}`")
+        entries.append((user_id, changes))
+    if errors:
+        raise BulkEntryError(errors)
+    return entries
+
+
+def parse_csv(content):
+    """Lit un CSV `joueur,def,test,atq,etoiles` (en-tête facultatif, cellule vide = inchangé)"""
+    entries = []
+    errors = []
+    for number, row in enumerate(csv.reader(io.StringIO(content)), 1):
+        if not row or not any(cell.strip() for cell in row):
+            continue
+        user_id = parse_player(row[0])
+        if user_id is None:
+            if number == 1:
+                # Ligne d'en-tête
+                continue
+            errors.append(f"Ligne {number} : joueur `{row[0]}` non reconnu")
+            continue
+        changes = {}
+        for field, cell in zip(CSV_FIELDS, row[1:]):
+            if not cell.strip():
+                continue
+            try:
+                changes[field] = parse_value(field, cell)
+            except ValueError as e:
+                errors.append(f"Ligne {number} : {e}")
+        entries.append((user_id, changes))
+    if errors:
+        raise BulkEntryError(errors)
+    return entries
+
+
+def parse_roster(text):
+    """Lit une liste de joueurs (mentions ou identifiants séparés par des espaces, virgules ou ;) en user_ids"""
+    user_ids = []
+    errors = []
+    for token in re.split(r"[\s,;]+", text):
+        if not token:
+            continue
+        user_id = parse_player(token)
+        if user_id is None:
+            errors.append(f"Joueur `{token}` non reconnu")
+        elif user_id not in user_ids:
+            user_ids.append(user_id)
+    if errors:
+        raise BulkEntryError(errors)
+    return user_ids
@@ -0,0 +1,158 @@
+from models import GSSession, decode_state
+
+# Valeurs admises par champ du PlayerRecord (cibles 1-20, 1 à 3 étoiles)
+VALUE_RANGES = {'defense': (1, 20), 'test': (1, 20), 'attack': (1, 20), 'stars': (1, 3)}
+
+# Champs comparés pour calculer les deltas d'un joueur
+PLAYER_FIELDS = ('name', 'defense', 'test', 'attack', 'stars')
+# Événements visant un joueur existant (user_id en premier argument)
+PLAYER_EVENTS = {'remove_player', 'set', 'clear', 'reset_player'}
+# Événements sans effet sur les joueurs : appliqués sans delta
+SESSION_EVENTS = {'pages', 'deadline', 'reminded', 'archive'}
+
+
+def apply_op(state, op):
+    """Applique une mutation du journal à une GSSession (sans la valider, voir GSEngine.check) et retourne son résultat
+
+    add_player et clear retournent False s'ils n'ont rien changé, remove_player l'enregistrement retiré
+    (ou None) ; les autres mutations retournent True. Lève KeyError si le joueur visé n'existe pas.
+    """
+    name, *args = op
+    if name == 'init':
+        state.reset(args[0])
+    elif name == 'pages':
+        state.message_ids = list(args[0])
+    elif name == 'add_player':
+        return state.add_player(*args)
+    elif name == 'remove_player':
+        return state.remove_player(args[0])
+    elif name == 'set':
+        state.set_value(*args)
+    elif name == 'clear':
+        return state.clear_value(*args)
+    elif name == 'reset_player':
+        state.reset_player(args[0])
+    elif name == 'reset_actions':
+        state.reset_all_actions()
+    elif name == 'deadline':
+        state.set_deadline(*args)
+    elif name == 'reminded':
+        state.mark_reminded(*args)
+    elif name == 'restore':
+        # État complet rechargé depuis le backend partagé (écrit par un autre processus)
+        state.assign(decode_state(args[0]))
+    elif name == 'archive':
+        # Archivée dans la transaction du journal : rien à rejouer sur l'état
+        pass
+    else:
+        raise ValueError(f"Mutation inconnue : {name}")
+    return True
+
+
+class EventRejected(ValueError):
+    """Événement refusé par les règles de la GS ; le message est le motif du refus"""
+
+
+class GSEngine:
+    """Règles d'une GS, sans Discord : valide et applique les événements (vocabulaire du journal)
+
+    Utilisé par l'acteur de chaque session et par le banc de rejeu (bench/replay_gs.py).
+    """
+
+    def __init__(self, state=None, max_players=None):
+        self.state = state if state is not None else GSSession()
+        self.max_players = max_players  # None : roster non limité
+
+    def check(self, event):
+        """Retourne le motif de refus de l'événement (affichable tel quel), ou None s'il respecte les règles"""
+        name, *args = event
+        if name == 'init':
+            return self.check_roster(len(args[0]))
+        elif name == 'add_player':
+            if args[0] not in self.state:
+                return self.check_roster(len(self.state) + 1)
+        elif name in PLAYER_EVENTS:
+            if args[0] not in self.state:
+                return f"Le joueur <@{args[0]}> n'est pas dans la liste des joueurs GS"
+            if name in ('set', 'clear') and args[1] not in VALUE_RANGES:
+                return f"Champ {args[1]!r} inconnu"
+            if name == 'set':
+                low, high = VALUE_RANGES[args[1]]
+                if not isinstance(args[2], int) or not low <= args[2] <= high:
+                    return f"La valeur doit être comprise entre {low} et {high}"
+        elif name not in ('reset_actions', 'restore') and name not in SESSION_EVENTS:
+            return f"Événement {name!r} inconnu"
+        return None
+
+    def check_roster(self, size):
+        """Retourne le motif de refus d'un roster de `size` joueurs, ou None"""
+        if self.max_players is not None and size > self.max_players:
+            return f"{size} joueurs, maximum {self.max_players} autorisés"
+        return None
+
+    def apply(self, event):
+        """Applique un événement valide et retourne son résultat (voir apply_op) ; lève EventRejected sinon"""
+        reason = self.check(event)
+        if reason is not None:
+            raise EventRejected(reason)
+        return apply_op(self.state, event)
+
+    def apply_events(self, batch):
+        """Applique un lot d'événements dans l'ordre ; un événement refusé n'interrompt pas le lot
+
+        Retourne (deltas, refus) :
+        - deltas : [(n° d'événement, user_id, champ, ancienne valeur, nouvelle valeur)] ; champ 'player'
+          pour une arrivée (None -> nom) ou un départ (nom -> None)
+        - refus : [(n° d'événement, motif)]
+        """
+        deltas = []
+        rejected = []
+        for index, event in enumerate(batch):
+            before = self._snapshot(event)
+            try:
+                self.apply(event)
+            except EventRejected as e:
+                rejected.append((index, str(e)))
+                continue
+            deltas.extend(self._diff(index, before, self._snapshot(event)))
+        return deltas, rejected
+
+    def _snapshot(self, event):
+        name = event[0]
+        if name in SESSION_EVENTS:
+            return {}
+        if name in ('init', 'reset_actions', 'restore'):
+            players = list(self.state)
+        else:
+            player = self.state.get(event[1])
+            players = [player] if player is not None else []
+        snapshot = {player.user_id: tuple(getattr(player, field) for field in PLAYER_FIELDS) for player in players}
+        if name == 'init':
+            # Les joueurs du nouveau roster sont comparés même s'ils n'existaient pas
+            for user_id, *_ in event[1]:
+                snapshot.setdefault(user_id, None)
+        elif name == 'add_player':
+            snapshot.setdefault(event[1], None)
+        return snapshot
+
+    def _diff(self, index, before, after):
+        deltas = []
+        for user_id in sorted(before.keys() | after.keys()):
+            old, new = before.get(user_id), after.get(user_id)
+            if old == new:
+                continue
+            if old is None or new is None:
+                deltas.append((index, user_id, 'player', old and old[0], new and new[0]))
+                continue
+            for field, old_value, new_value in zip(PLAYER_FIELDS, old, new):
+                if old_value != new_value:
+                    deltas.append((index, user_id, field, old_value, new_value))
+        return deltas
+
+    def missing_actions(self):
+        """Retourne ({action: [user_id sans cette action]}, [user_id ayant tout fait])"""
+        missing, completed = self.state.missing_actions()
+        return (
+            {action: [player.user_id for player in players] for action, players in missing.items()},
+            [player.user_id for player in completed]
+        )
@@ -0,0 +1,70 @@
+import asyncio
+import json
+import logging
+import time
+
+log = logging.getLogger(__name__)
+
+
+def encode_event(at, key, ops):
+    guild_id, channel_id = key
+    return json.dumps({'t': round(at, 3), 'guild': guild_id, 'channel': channel_id, 'ops': ops}, ensure_ascii=False)
+
+
+def read_events(path):
+    """Relit un enregistrement : [(instant, (guild_id, channel_id), mutations)] dans l'ordre de soumission"""
+    events = []
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                event = json.loads(line)
+                events.append((event['t'], (event['guild'], event['channel']), event['ops']))
+    return events
+
+
+class EventRecorder:
+    """Enregistre en JSONL les lots de mutations soumis aux sessions, pour les rejouer hors de Discord
+
+    Une ligne par lot : {"t": instant, "guild": ..., "channel": ..., "ops": [mutation, ...]}. Les lignes
+    sont écrites par paquets en arrière-plan, comme le journal.
+    """
+
+    def __init__(self, path, flush_interval: float = 1.0, clock=time.time):
+        self.path = path
+        self.flush_interval = flush_interval
+        self._clock = clock
+        self._buffer = []
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    def record(self, key, ops):
+        self._buffer.append(encode_event(self._clock(), key, ops))
+        self._wakeup.set()
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            await asyncio.sleep(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except OSError:
+                log.exception("Erreur lors de l'enregistrement des événements GS")
+
+    async def flush(self):
+        if not self._buffer:
+            return
+        lines, self._buffer = self._buffer, []
+        await asyncio.to_thread(self._write, lines)
+
+    def _write(self, lines):
+        with open(self.path, 'a', encoding='utf-8') as f:
+            f.write("\n".join(lines) + "\n")
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+        await self.flush()
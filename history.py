@@ -0,0 +1,106 @@
+from models import ACTIONS, UNSET
+
+MAX_STARS = 3
+
+
+def create_tables(conn):
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS war ("
+        "war_id INTEGER PRIMARY KEY AUTOINCREMENT, guild_id INTEGER NOT NULL, channel_id INTEGER NOT NULL, "
+        "closed_at REAL NOT NULL, players INTEGER NOT NULL, completed INTEGER NOT NULL, "
+        "stars INTEGER NOT NULL, three_stars INTEGER NOT NULL)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS war_by_guild ON war (guild_id, war_id)")
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS war_player ("
+        "war_id INTEGER NOT NULL, user_id INTEGER NOT NULL, name TEXT NOT NULL, "
+        "defense INTEGER NOT NULL, test INTEGER NOT NULL, attack INTEGER NOT NULL, stars INTEGER NOT NULL, "
+        "PRIMARY KEY (war_id, user_id))"
+    )
+    # Agrégats par joueur : mis à jour à l'archivage pour ne jamais rescanner les GS passées
+    conn.execute(
+        "CREATE TABLE IF NOT EXISTS player_rollup ("
+        "guild_id INTEGER NOT NULL, user_id INTEGER NOT NULL, name TEXT NOT NULL, "
+        "wars INTEGER NOT NULL, completed INTEGER NOT NULL, actions INTEGER NOT NULL, stars INTEGER NOT NULL, "
+        "stars_0 INTEGER NOT NULL, stars_1 INTEGER NOT NULL, stars_2 INTEGER NOT NULL, stars_3 INTEGER NOT NULL, "
+        "last_war_id INTEGER NOT NULL, PRIMARY KEY (guild_id, user_id))"
+    )
+
+
+def archive_war(conn, key, state, closed_at):
+    """Archive une GS et met à jour les agrégats de ses joueurs ; à appeler dans la transaction du journal
+
+    Retourne l'identifiant de la GS archivée, ou None si elle n'avait aucun joueur.
+    """
+    players = list(state)
+    if not players:
+        return None
+    guild_id, channel_id = key
+    done = [sum(getattr(player, action) != UNSET for action in ACTIONS) for player in players]
+    stars = [min(player.stars, MAX_STARS) for player in players]
+    cursor = conn.execute(
+        "INSERT INTO war (guild_id, channel_id, closed_at, players, completed, stars, three_stars) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        (guild_id, channel_id, closed_at, len(players), done.count(len(ACTIONS)), sum(stars), stars.count(MAX_STARS))
+    )
+    war_id = cursor.lastrowid
+    conn.executemany(
+        "INSERT INTO war_player (war_id, user_id, name, defense, test, attack, stars) VALUES (?, ?, ?, ?, ?, ?, ?)",
+        [(war_id, p.user_id, p.name, p.defense, p.test, p.attack, p.stars) for p in players]
+    )
+    conn.executemany(
+        "INSERT INTO player_rollup VALUES (?, ?, ?, 1, ?, ?, ?, ?, ?, ?, ?, ?) "
+        "ON CONFLICT (guild_id, user_id) DO UPDATE SET "
+        "name = excluded.name, wars = wars + 1, completed = completed + excluded.completed, "
+        "actions = actions + excluded.actions, stars = stars + excluded.stars, "
+        "stars_0 = stars_0 + excluded.stars_0, stars_1 = stars_1 + excluded.stars_1, "
+        "stars_2 = stars_2 + excluded.stars_2, stars_3 = stars_3 + excluded.stars_3, "
+        "last_war_id = excluded.last_war_id",
+        [
+            (guild_id, player.user_id, player.name, int(count == len(ACTIONS)), count, star,
+             *(int(star == n) for n in range(MAX_STARS + 1)), war_id)
+            for player, count, star in zip(players, done, stars)
+        ]
+    )
+    return war_id
+
+
+def recent_wars(conn, guild_id, limit):
+    """Dernières GS archivées du serveur, de la plus récente à la plus ancienne"""
+    rows = conn.execute(
+        "SELECT war_id, channel_id, closed_at, players, completed, stars, three_stars FROM war "
+        "WHERE guild_id = ? ORDER BY war_id DESC LIMIT ?",
+        (guild_id, limit)
+    ).fetchall()
+    columns = ('war_id', 'channel_id', 'closed_at', 'players', 'completed', 'stars', 'three_stars')
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def player_stats(conn, guild_id, user_id):
+    """Agrégats d'un joueur sur toutes les GS archivées du serveur, ou None"""
+    row = conn.execute(
+        "SELECT name, wars, completed, actions, stars, stars_0, stars_1, stars_2, stars_3, last_war_id "
+        "FROM player_rollup WHERE guild_id = ? AND user_id = ?",
+        (guild_id, user_id)
+    ).fetchone()
+    if row is None:
+        return None
+    name, wars, completed, actions, stars, *distribution, last_war_id = row
+    return {
+        'name': name,
+        'wars': wars,
+        'completed': completed,
+        'completion_rate': completed / wars,
+        'action_rate': actions / (wars * len(ACTIONS)),
+        'average_stars': stars / wars,
+        'star_distribution': distribution,
+        'last_war_id': last_war_id,
+    }
+
+
+def last_roster(conn, guild_id, channel_id):
+    """Joueurs [(user_id, nom)] de la dernière GS archivée dans ce salon"""
+    return conn.execute(
+        "SELECT user_id, name FROM war_player WHERE war_id = "
+        "(SELECT MAX(war_id) FROM war WHERE guild_id = ? AND channel_id = ?) ORDER BY name",
+        (guild_id, channel_id)
+    ).fetchall()
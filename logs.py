@@ -0,0 +1,33 @@
+import logging
+import logging.handlers
+import queue
+import sys
+
+
+class KeyValueFormatter(logging.Formatter):
+    """Ajoute les champs structurés (`extra={'fields': {...}}`) sous la forme clé=valeur"""
+
+    def format(self, record):
+        message = super().format(record)
+        fields = getattr(record, 'fields', None)
+        if fields:
+            message += " " + " ".join(f"{key}={value}" for key, value in fields.items())
+        return message
+
+
+def setup_logging(level=logging.INFO):
+    """Envoie les logs dans une file : l'écriture sur stdout se fait dans un thread dédié
+
+    Retourne le QueueListener, à arrêter à la fermeture du bot pour vider la file.
+    """
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(KeyValueFormatter('%(asctime)s %(levelname)s %(name)s: %(message)s'))
+
+    log_queue = queue.SimpleQueue()
+    root = logging.getLogger()
+    root.setLevel(level)
+    root.addHandler(logging.handlers.QueueHandler(log_queue))
+
+    listener = logging.handlers.QueueListener(log_queue, handler, respect_handler_level=True)
+    listener.start()
+    return listener
@@ -0,0 +1,219 @@
+import contextlib
+import contextvars
+import functools
+import os
+import re
+import time
+from collections import deque
+
+import aiohttp
+
+# Bornes des histogrammes (en secondes), au format Prometheus
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Requêtes de l'adaptateur webhook de discord.py (réponses et suivis d'interaction) : elles ne passent
+# pas par HTTPClient.request et ne sont vues que par la TraceConfig
+INTERACTION_CALLBACK_RE = re.compile(r"/interactions/\d+/[^/]+/callback")
+INTERACTION_WEBHOOK_RE = re.compile(r"/webhooks/\d+/[^/]+")
+
+# Appel en cours (commande ou tâche de fond) auquel attribuer les requêtes REST
+_current = contextvars.ContextVar('gs_metrics_call', default=None)
+
+
+class CallRecord:
+    """Mesures d'une exécution de commande"""
+
+    __slots__ = ('started', 'ack', 'rest_calls', 'attempts', 'rate_limited', 'error')
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.ack = None  # Délai avant la réponse (ou le report) de l'interaction
+        self.rest_calls = 0
+        self.attempts = 0  # Tentatives HTTP réelles, retries compris
+        self.rate_limited = 0
+        self.error = False
+
+
+class RollingHistogram:
+    """Histogramme cumulé (pour Prometheus) et fenêtre glissante des derniers échantillons (pour les percentiles)"""
+
+    def __init__(self, window=500):
+        self.counts = [0] * (len(BUCKETS) + 1)
+        self.total = 0.0
+        self.count = 0
+        self.recent = deque(maxlen=window)
+
+    def observe(self, value):
+        for i, bound in enumerate(BUCKETS):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.total += value
+        self.count += 1
+        self.recent.append(value)
+
+    def percentile_ms(self, q):
+        if not self.recent:
+            return None
+        ordered = sorted(self.recent)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+
+class CommandStats:
+    def __init__(self):
+        self.ack = RollingHistogram()
+        self.duration = RollingHistogram()
+        self.rest_calls = 0
+        self.retries = 0
+        self.rate_limited = 0
+        self.errors = 0
+
+
+class CommandMetrics:
+    """Latences des commandes et appels REST Discord, par commande"""
+
+    def __init__(self):
+        self.commands = {}  # Format: {nom de commande: CommandStats}
+        self.watch = None  # Surveillance de la boucle : callable(nom, coroutine) -> awaitable
+
+    def instrument(self, func):
+        """Décorateur des callbacks de commandes slash"""
+        @functools.wraps(func)
+        async def wrapper(interaction, *args, **kwargs):
+            name = interaction.command.qualified_name if interaction.command else func.__name__
+            with self.track(name):
+                coro = func(interaction, *args, **kwargs)
+                if self.watch is not None:
+                    coro = self.watch(name, coro)
+                return await coro
+        return wrapper
+
+    @contextlib.contextmanager
+    def track(self, name):
+        """Attribue les requêtes REST émises dans ce bloc à `name` et mesure sa durée"""
+        record = CallRecord()
+        token = _current.set(record)
+        try:
+            yield record
+        except Exception:
+            record.error = True
+            raise
+        finally:
+            _current.reset(token)
+            self._observe(name, record, time.perf_counter() - record.started)
+
+    def _observe(self, name, record, duration):
+        stats = self.commands.get(name)
+        if stats is None:
+            stats = self.commands[name] = CommandStats()
+        stats.duration.observe(duration)
+        if record.ack is not None:
+            stats.ack.observe(record.ack)
+        stats.rest_calls += record.rest_calls
+        stats.retries += max(0, record.attempts - record.rest_calls)
+        stats.rate_limited += record.rate_limited
+        stats.errors += record.error
+
+    def install(self, http):
+        """Compte les requêtes logiques émises par le client HTTP de discord.py (hors interactions)"""
+        request = http.request
+
+        async def counted_request(route, **kwargs):
+            record = _current.get()
+            try:
+                return await request(route, **kwargs)
+            finally:
+                if record is not None:
+                    record.rest_calls += 1
+
+        http.request = counted_request
+
+    @staticmethod
+    def _observe_interaction_request(record, url, status=None):
+        """Compte une requête de réponse ou de suivi d'interaction ; la première réponse fixe l'accusé"""
+        callback = INTERACTION_CALLBACK_RE.search(url) is not None
+        if not callback and INTERACTION_WEBHOOK_RE.search(url) is None:
+            return
+        if record.ack is None and callback:
+            record.ack = time.perf_counter() - record.started
+        # L'adaptateur webhook réessaie lui-même après un 429 ou une erreur 5xx : seule la dernière
+        # tentative compte comme requête logique
+        if status is None or (status != 429 and status < 500):
+            record.rest_calls += 1
+
+    def trace_config(self):
+        """TraceConfig aiohttp comptant chaque tentative HTTP réelle (retries et 429 compris)"""
+        async def on_request_end(session, context, params):
+            record = _current.get()
+            if record is not None:
+                record.attempts += 1
+                if params.response.status == 429:
+                    record.rate_limited += 1
+                self._observe_interaction_request(record, str(params.url), params.response.status)
+
+        async def on_request_exception(session, context, params):
+            record = _current.get()
+            if record is not None:
+                record.attempts += 1
+                self._observe_interaction_request(record, str(params.url))
+
+        trace = aiohttp.TraceConfig()
+        trace.on_request_end.append(on_request_end)
+        trace.on_request_exception.append(on_request_exception)
+        return trace
+
+    def summary(self):
+        """Résumé par commande : nombre d'appels, percentiles (ms) et compteurs REST"""
+        rows = {}
+        for name, stats in sorted(self.commands.items()):
+            rows[name] = {
+                'count': stats.duration.count,
+                'ack_p50_ms': stats.ack.percentile_ms(0.50),
+                'ack_p95_ms': stats.ack.percentile_ms(0.95),
+                'total_p50_ms': stats.duration.percentile_ms(0.50),
+                'total_p95_ms': stats.duration.percentile_ms(0.95),
+                'rest_calls': stats.rest_calls,
+                'retries': stats.retries,
+                'rate_limited': stats.rate_limited,
+                'errors': stats.errors,
+            }
+        return rows
+
+    def render_prometheus(self):
+        """Exporte les métriques au format texte Prometheus"""
+        lines = []
+        for metric, attr, help_text in (
+            ('gs_command_duration_seconds', 'duration', "Durée totale du handler"),
+            ('gs_command_ack_seconds', 'ack', "Délai avant l'accusé de réception de l'interaction"),
+        ):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} histogram")
+            for name, stats in sorted(self.commands.items()):
+                histogram = getattr(stats, attr)
+                cumulative = 0
+                for bound, count in zip(BUCKETS + ('+Inf',), histogram.counts):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{command="{name}",le="{bound}"}} {cumulative}')
+                lines.append(f'{metric}_sum{{command="{name}"}} {histogram.total}')
+                lines.append(f'{metric}_count{{command="{name}"}} {histogram.count}')
+        for metric, attr, help_text in (
+            ('gs_rest_requests_total', 'rest_calls', "Requêtes REST Discord émises"),
+            ('gs_rest_retries_total', 'retries', "Tentatives HTTP supplémentaires (retries)"),
+            ('gs_rest_ratelimited_total', 'rate_limited', "Réponses 429 reçues"),
+            ('gs_command_errors_total', 'errors', "Handlers terminés par une exception"),
+        ):
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} counter")
+            for name, stats in sorted(self.commands.items()):
+                lines.append(f'{metric}{{command="{name}"}} {getattr(stats, attr)}')
+        return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path, text):
+    """Écrit le fichier d'export de façon atomique (à appeler hors de la boucle d'événements)"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
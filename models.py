@@ -0,0 +1,210 @@
+import json
+
+UNSET = 0  # Valeur d'une action non renseignée (les cibles vont de 1 à 20)
+ACTIONS = ('defense', 'test', 'attack')
+TARGETS = range(1, 21)
+
+
+class PlayerRecord:
+    """Participant d'une GS et ses actions"""
+
+    __slots__ = ('user_id', 'name', 'mention', 'defense', 'test', 'attack', 'stars')
+
+    def __init__(self, user_id, name, mention, defense=UNSET, test=UNSET, attack=UNSET, stars=0):
+        self.user_id = user_id
+        self.name = name
+        self.mention = mention
+        self.defense = defense
+        self.test = test
+        self.attack = attack
+        self.stars = stars
+
+    def reset_actions(self):
+        self.defense = UNSET
+        self.test = UNSET
+        self.attack = UNSET
+
+
+class GSSession:
+    """État d'une Guerre Sainte : participants indexés par user_id, occupation des cibles et message du tableau"""
+
+    __slots__ = ('players', 'message_ids', 'targets', 'deadline', 'reminder_offsets', 'reminded')
+
+    def __init__(self):
+        self.players = {}  # Format: {user_id: PlayerRecord}, dans l'ordre d'ajout
+        self.message_ids = []  # IDs des messages du tableau, une page par message (la première est épinglée)
+        self.targets = {action: {} for action in ACTIONS}  # Format: {action: {cible: {user_id}}}
+        self.deadline = None  # Fin de la GS (timestamp), pour les rappels
+        self.reminder_offsets = ()  # Rappels, en secondes avant la fin
+        self.reminded = {}  # Format: {délai du rappel: {user_id déjà rappelés}}
+
+    @property
+    def message_id(self):
+        """ID du message épinglé (première page du tableau)"""
+        return self.message_ids[0] if self.message_ids else None
+
+    def __len__(self):
+        return len(self.players)
+
+    def __contains__(self, user_id):
+        return user_id in self.players
+
+    def __iter__(self):
+        return iter(self.players.values())
+
+    def get(self, user_id):
+        return self.players.get(user_id)
+
+    def _claim(self, action, target, user_id):
+        self.targets[action].setdefault(target, set()).add(user_id)
+
+    def _release(self, action, target, user_id):
+        claimants = self.targets[action].get(target)
+        if claimants is not None:
+            claimants.discard(user_id)
+            if not claimants:
+                del self.targets[action][target]
+
+    def _release_player(self, player):
+        for action in ACTIONS:
+            value = getattr(player, action)
+            if value != UNSET:
+                self._release(action, value, player.user_id)
+
+    def reindex(self):
+        """Reconstruit l'index des cibles après un chargement direct des PlayerRecord"""
+        self.targets = {action: {} for action in ACTIONS}
+        for player in self.players.values():
+            for action in ACTIONS:
+                value = getattr(player, action)
+                if value != UNSET:
+                    self._claim(action, value, player.user_id)
+
+    def reset(self, players=()):
+        """Démarre une nouvelle GS avec les joueurs (user_id, nom, mention) donnés"""
+        self.players = {}
+        self.message_ids = []
+        self.targets = {action: {} for action in ACTIONS}
+        self.deadline = None
+        self.reminder_offsets = ()
+        self.reminded = {}
+        for user_id, name, mention in players:
+            self.players[user_id] = PlayerRecord(user_id, name, mention)
+
+    def assign(self, other):
+        """Remplace tout l'état par celui d'une autre GSSession (état rechargé depuis le backend partagé)"""
+        for attr in self.__slots__:
+            setattr(self, attr, getattr(other, attr))
+
+    def add_player(self, user_id, name, mention):
+        """Ajoute un joueur ; retourne False s'il participait déjà"""
+        if user_id in self.players:
+            return False
+        self.players[user_id] = PlayerRecord(user_id, name, mention)
+        return True
+
+    def remove_player(self, user_id):
+        """Retire un joueur et toutes ses actions ; retourne son enregistrement ou None"""
+        player = self.players.pop(user_id, None)
+        if player is not None:
+            self._release_player(player)
+        return player
+
+    def set_value(self, user_id, field, value):
+        """Renseigne une action ('defense', 'test', 'attack') ou les étoiles d'un joueur"""
+        player = self.players[user_id]
+        if field in self.targets:
+            previous = getattr(player, field)
+            if previous != UNSET:
+                self._release(field, previous, user_id)
+            if value != UNSET:
+                self._claim(field, value, user_id)
+        setattr(player, field, value)
+
+    def clear_value(self, user_id, field):
+        """Efface une action d'un joueur ; retourne False si elle n'était pas renseignée"""
+        player = self.players[user_id]
+        previous = getattr(player, field)
+        if previous == UNSET:
+            return False
+        if field in self.targets:
+            self._release(field, previous, user_id)
+        setattr(player, field, UNSET)
+        return True
+
+    def reset_player(self, user_id):
+        """Efface la défense, le test et l'attaque d'un joueur"""
+        player = self.players[user_id]
+        self._release_player(player)
+        player.reset_actions()
+
+    def reset_all_actions(self):
+        """Efface les défenses, tests et attaques de tous les joueurs (les étoiles sont conservées)"""
+        for player in self.players.values():
+            player.reset_actions()
+        self.targets = {action: {} for action in ACTIONS}
+
+    def set_deadline(self, deadline, offsets):
+        """Fixe la fin de la GS et les rappels (secondes avant la fin) ; les rappels déjà envoyés sont oubliés"""
+        self.deadline = deadline
+        self.reminder_offsets = tuple(sorted(offsets, reverse=True))
+        self.reminded = {}
+
+    def mark_reminded(self, offset, user_ids):
+        self.reminded.setdefault(offset, set()).update(user_ids)
+
+    def claimants(self, action, target):
+        """Joueurs (user_id) ayant choisi cette cible pour cette action"""
+        return self.targets[action].get(target, frozenset())
+
+    def free_targets(self, action):
+        """Cibles que personne n'a encore choisies pour cette action"""
+        taken = self.targets[action]
+        return [target for target in TARGETS if target not in taken]
+
+    def contested_targets(self, action):
+        """Cibles choisies par plusieurs joueurs pour cette action : {cible: nombre de joueurs}"""
+        return {target: len(claimants) for target, claimants in self.targets[action].items() if len(claimants) > 1}
+
+    def missing_actions(self):
+        """Retourne ({action: [joueurs sans cette action]}, [joueurs ayant tout fait]) en un seul passage"""
+        missing = {action: [] for action in ACTIONS}
+        all_done = []
+        for player in self.players.values():
+            complete = True
+            for action in ACTIONS:
+                if getattr(player, action) == UNSET:
+                    missing[action].append(player)
+                    complete = False
+            if complete:
+                all_done.append(player)
+        return missing, all_done
+
+
+def encode_state(state):
+    # Une ligne par joueur pour garder les user_id entiers (les clés JSON sont des chaînes)
+    return json.dumps({
+        'players': [
+            [p.user_id, p.name, p.mention, p.defense, p.test, p.attack, p.stars]
+            for p in state
+        ],
+        'message_ids': state.message_ids,
+        'deadline': state.deadline,
+        'reminder_offsets': list(state.reminder_offsets),
+        'reminded': [[offset, sorted(user_ids)] for offset, user_ids in state.reminded.items()]
+    })
+
+
+def decode_state(raw):
+    encoded = json.loads(raw)
+    state = GSSession()
+    for row in encoded['players']:
+        state.players[row[0]] = PlayerRecord(*row)
+    state.message_ids = encoded['message_ids']
+    # Instantanés antérieurs aux rappels : pas d'échéance
+    if encoded.get('deadline') is not None:
+        state.set_deadline(encoded['deadline'], encoded['reminder_offsets'])
+        for offset, user_ids in encoded['reminded']:
+            state.mark_reminded(offset, user_ids)
+    state.reindex()
+    return state
@@ -0,0 +1,184 @@
+import asyncio
+import cProfile
+import io
+import logging
+import os
+import pstats
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+
+from metrics import RollingHistogram
+
+log = logging.getLogger(__name__)
+
+
+class _Watched:
+    """Exécute une coroutine en chronométrant chaque étape synchrone (le temps passé entre deux `await`)
+
+    Une étape est le temps pendant lequel la coroutine bloque la boucle d'événements. Si un profileur
+    est fourni, il n'est actif que pendant ces étapes.
+    """
+
+    def __init__(self, coro, profiler=None):
+        self._coro = coro
+        self._profiler = profiler
+        self.max_step = 0.0
+        self.blocked = 0.0
+
+    def __await__(self):
+        coro = self._coro
+        value, error = None, None
+        while True:
+            start = time.perf_counter()
+            if self._profiler is not None:
+                self._profiler.enable()
+            try:
+                if error is not None:
+                    yielded = coro.throw(error)
+                else:
+                    yielded = coro.send(value)
+            except StopIteration as e:
+                return e.value
+            finally:
+                if self._profiler is not None:
+                    self._profiler.disable()
+                step = time.perf_counter() - start
+                self.blocked += step
+                self.max_step = max(self.max_step, step)
+            try:
+                value, error = (yield yielded), None
+            except GeneratorExit:
+                coro.close()
+                raise
+            except BaseException as e:  # Annulation comprise : transmise à la coroutine
+                value, error = None, e
+
+
+class HandlerStats:
+    def __init__(self):
+        self.calls = 0
+        self.slow = 0  # Exécutions ayant bloqué la boucle plus longtemps que le seuil
+        self.worst = 0.0  # Plus longue étape bloquante observée (s)
+        self.profiled = 0.0  # Étape bloquante du pire profil déjà écrit (s)
+
+
+class LoopWatchdog:
+    """Chien de garde de la boucle d'événements
+
+    - Une tâche mesure le retard de la boucle toutes les `interval` secondes (histogramme du lag).
+    - Un thread surveille ses battements : si la boucle ne répond plus depuis `threshold`, la pile du
+      thread de la boucle est capturée pendant le blocage.
+    - Les commandes et listeners exécutés via `watch` sont chronométrés étape par étape ; ceux qui
+      bloquent la boucle plus de `threshold` sont signalés.
+    - Profilage activable à chaud : la prochaine exécution d'un handler déjà signalé est profilée
+      (cProfile) et le profil écrit dans `profile_dir`, ainsi que les piles capturées pendant les blocages.
+    """
+
+    def __init__(self, threshold: float = 0.1, interval: float = 0.05, profile_dir: str = 'profiles'):
+        self.threshold = threshold
+        self.interval = interval
+        self.profile_dir = profile_dir
+        self.profiling = False
+        self.lag = RollingHistogram()
+        self.max_lag = 0.0
+        self.handlers = {}  # Format: {nom du handler: HandlerStats}
+        self.stalls = deque(maxlen=20)  # Format: [(instant, durée minimale du blocage, pile)]
+        self._beat = None  # Dernier battement de la boucle (time.monotonic())
+        self._loop_thread = None
+        self._task = None
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        self._loop_thread = threading.get_ident()
+        self._beat = time.monotonic()
+        self._task = asyncio.create_task(self._sample())
+        self._thread = threading.Thread(target=self._guard, name="gs-watchdog", daemon=True)
+        self._thread.start()
+
+    async def _sample(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self._beat = time.monotonic()
+            self.lag.observe(lag)
+            self.max_lag = max(self.max_lag, lag)
+            if lag > self.threshold:
+                log.warning("Boucle d'événements bloquée %.0f ms", lag * 1000)
+
+    def _guard(self):
+        # Un seul échantillon de pile par blocage
+        stalled_since = None
+        while not self._stop.wait(self.threshold / 2):
+            beat = self._beat
+            stalled = time.monotonic() - beat
+            if stalled < self.threshold + self.interval:
+                continue
+            if stalled_since == beat:
+                continue
+            stalled_since = beat
+            frame = sys._current_frames().get(self._loop_thread)
+            if frame is None:
+                continue
+            stack = "".join(traceback.format_stack(frame))
+            self.stalls.append((time.time(), stalled, stack))
+            if self.profiling:
+                self._write(f"stall-{int(time.time() * 1000)}.txt", stack)
+
+    def watch(self, name, coro):
+        """Retourne un awaitable exécutant `coro` sous surveillance, attribuée au handler `name`"""
+        stats = self.handlers.get(name)
+        if stats is None:
+            stats = self.handlers[name] = HandlerStats()
+        # Seuls les handlers déjà signalés sont profilés : le profileur ralentit l'exécution
+        profiler = cProfile.Profile() if self.profiling and stats.slow else None
+        return self._run(name, stats, _Watched(coro, profiler), profiler)
+
+    async def _run(self, name, stats, watched, profiler):
+        try:
+            return await watched
+        finally:
+            stats.calls += 1
+            stats.worst = max(stats.worst, watched.max_step)
+            if watched.max_step > self.threshold:
+                stats.slow += 1
+                log.warning("%s a bloqué la boucle %.0f ms", name, watched.max_step * 1000)
+            if profiler is not None and watched.max_step > max(self.threshold, stats.profiled):
+                # On ne garde que le pire profil de chaque handler
+                stats.profiled = watched.max_step
+                asyncio.get_running_loop().run_in_executor(None, self._dump_profile, name, profiler)
+
+    def _dump_profile(self, name, profiler):
+        report = io.StringIO()
+        pstats.Stats(profiler, stream=report).sort_stats('cumulative').print_stats(40)
+        safe_name = "".join(c if c.isalnum() else '_' for c in name)
+        path = self._write(f"profile-{safe_name}.txt", report.getvalue())
+        if path is not None:
+            profiler.dump_stats(os.path.splitext(path)[0] + ".prof")
+
+    def _write(self, filename, text):
+        try:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            path = os.path.join(self.profile_dir, filename)
+            with open(path, 'w') as f:
+                f.write(text)
+        except OSError:
+            log.exception("Impossible d'écrire %s", filename)
+            return None
+        log.info("Profil écrit : %s", path)
+        return path
+
+    def worst_handlers(self, limit=10):
+        """Handlers signalés, du plus bloquant au moins bloquant : [(nom, HandlerStats)]"""
+        slow = [(name, stats) for name, stats in self.handlers.items() if stats.slow]
+        return sorted(slow, key=lambda item: item[1].worst, reverse=True)[:limit]
+
+    async def close(self):
+        self._stop.set()
+        if self._task is not None:
+            self._task.cancel()
@@ -0,0 +1,223 @@
+import asyncio
+import contextvars
+import heapq
+import itertools
+import logging
+import re
+
+import discord
+
+log = logging.getLogger(__name__)
+
+# Priorités des envois en arrière-plan (les accusés de réception des interactions passent toujours avant)
+PRIORITY_BOARD = 1
+PRIORITY_PIN = 2
+PRIORITY_REMINDER = 3
+
+# Délai de réponse d'une interaction fixé par Discord
+ACK_DEADLINE = 3.0
+
+# Route de l'envoi en cours dans ce worker : ses requêtes épuisent aussi cette route (DM : le message
+# part vers /channels/{id du DM}, mais l'envoi attend sur la route ('dm',))
+_current_route = contextvars.ContextVar('outbox_route', default=None)
+
+CHANNEL_URL_RE = re.compile(r"/channels/(\d+)")
+# Réponse à une interaction : envoyée par l'adaptateur webhook de discord.py, pas par HTTPClient.request
+INTERACTION_CALLBACK_RE = re.compile(r"/interactions/(\d+)/[^/]+/callback")
+
+
+def route_for_url(url):
+    """Route (au sens des limites de débit) d'une URL de l'API : ('channel', id), ('dm',) ou None"""
+    match = CHANNEL_URL_RE.search(url)
+    if match is not None:
+        return ('channel', int(match.group(1)))
+    if url.endswith('/users/@me/channels'):
+        return ('dm',)
+    return None
+
+
+class Outbox:
+    """File sortante priorisée pour tout ce qui n'est pas un accusé de réception d'interaction
+
+    - Tant qu'une interaction reçue n'a pas été acquittée (au plus ACK_DEADLINE), rien n'est envoyé.
+    - Les envois sont servis par priorité ; une route épuisée (en-têtes X-RateLimit ou 429) est mise
+      de côté jusqu'à sa réinitialisation au lieu de bloquer les autres salons.
+    - Une seule requête à la fois par route, et un envoi identifié par une clé déjà en attente est ignoré.
+    - Les rappels sont cadencés par un seau à jetons (`rate` par seconde, `burst` d'affilée), et `submit`
+      fait attendre le producteur quand la file contient `max_pending` envois.
+    """
+
+    def __init__(self, rate: float, burst: int, max_pending: int = 1000, workers: int = 4):
+        self.rate = rate
+        self.burst = burst
+        self.max_pending = max_pending
+        self.workers = workers
+        self._tokens = float(burst)
+        self._refilled = None
+        self._heap = []  # Format: [(priorité, n°, clé, envoi, route)]
+        self._counter = itertools.count()
+        self._pending = set()  # Clés des envois en attente
+        self._busy = set()  # Routes ayant une requête en cours
+        self._cooldowns = {}  # Format: {route: instant (loop.time()) de réinitialisation}
+        self._awaiting_ack = {}  # Format: {interaction_id: échéance (loop.time())}
+        self._changed = asyncio.Event()  # Nouvel envoi, route libérée ou interaction acquittée
+        self._space = asyncio.Event()  # Un envoi a quitté la file
+        self._tasks = []
+        self.sent = 0
+        self.failed = 0
+        self.deferred = 0  # Envois mis de côté parce que leur route était épuisée
+
+    def start(self):
+        self._tasks = [asyncio.create_task(self._run()) for _ in range(self.workers)]
+
+    def __len__(self):
+        return len(self._heap)
+
+    def put(self, key, send, priority=PRIORITY_REMINDER, route=None):
+        """Planifie `send` (coroutine sans argument) ; retourne False si la clé est déjà en attente"""
+        if key in self._pending:
+            return False
+        self._pending.add(key)
+        heapq.heappush(self._heap, (priority, next(self._counter), key, send, route))
+        self._changed.set()
+        return True
+
+    async def submit(self, key, send, priority=PRIORITY_REMINDER, route=None):
+        """Comme `put`, mais attend qu'il y ait de la place dans la file (contre-pression)"""
+        while len(self._heap) >= self.max_pending:
+            self._space.clear()
+            await self._space.wait()
+        return self.put(key, send, priority, route)
+
+    # Accusés de réception des interactions
+
+    def expect_ack(self, interaction_id):
+        """Suspend les envois jusqu'à la réponse (ou le report) de cette interaction"""
+        self._awaiting_ack[interaction_id] = asyncio.get_running_loop().time() + ACK_DEADLINE
+
+    def observe_callback(self, url):
+        """Reprend les envois quand la réponse (ou le report) d'une interaction attendue est partie"""
+        match = INTERACTION_CALLBACK_RE.search(url)
+        if match is not None and self._awaiting_ack.pop(int(match.group(1)), None) is not None:
+            self._changed.set()
+
+    def observe_response(self, url, status, headers):
+        """Met de côté la route de l'URL, et celle de l'envoi qui a fait la requête, quand Discord signale son épuisement"""
+        routes = {route_for_url(url), _current_route.get()} - {None}
+        if not routes:
+            return
+        reset_after = None
+        if status == 429:
+            reset_after = headers.get('Retry-After')
+        elif headers.get('X-RateLimit-Remaining') == '0':
+            reset_after = headers.get('X-RateLimit-Reset-After')
+        if reset_after is not None:
+            ready_at = asyncio.get_running_loop().time() + float(reset_after)
+            for route in routes:
+                self._cooldowns[route] = max(self._cooldowns.get(route, 0), ready_at)
+
+    def trace_hook(self):
+        """Callback aiohttp on_request_end alimentant `observe_callback` et `observe_response`
+
+        La session aiohttp est partagée par le client HTTP et l'adaptateur webhook : les réponses aux
+        interactions y passent aussi.
+        """
+        async def on_request_end(session, context, params):
+            url = str(params.url)
+            self.observe_callback(url)
+            self.observe_response(url, params.response.status, params.response.headers)
+        return on_request_end
+
+    # Distribution
+
+    def _next_ready(self, now):
+        """Retire et retourne le premier envoi prêt par priorité, ou (None, prochain instant utile)"""
+        skipped = []
+        found = None
+        wake = None
+        while self._heap:
+            entry = heapq.heappop(self._heap)
+            route = entry[4]
+            ready_at = self._cooldowns.get(route, 0)
+            if route is not None and (route in self._busy or ready_at > now):
+                skipped.append(entry)
+                if route not in self._busy:
+                    wake = ready_at if wake is None else min(wake, ready_at)
+                continue
+            found = entry
+            break
+        for entry in skipped:
+            heapq.heappush(self._heap, entry)
+        if skipped and found is not None:
+            self.deferred += 1
+        return found, wake
+
+    def _ack_wait(self, now):
+        """Délai pendant lequel une interaction attend encore sa réponse, ou None"""
+        for interaction_id, deadline in list(self._awaiting_ack.items()):
+            if deadline <= now:
+                del self._awaiting_ack[interaction_id]
+        if not self._awaiting_ack:
+            return None
+        return min(self._awaiting_ack.values()) - now
+
+    async def _take(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            # Effacer avant de regarder la file : un signal arrivé pendant l'examen n'est pas perdu
+            self._changed.clear()
+            now = loop.time()
+            timeout = self._ack_wait(now)
+            if timeout is None:
+                entry, wake = self._next_ready(now)
+                if entry is not None:
+                    self._space.set()
+                    return entry
+                timeout = None if wake is None else max(0.0, wake - now)
+            try:
+                await asyncio.wait_for(self._changed.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _acquire_token(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            now = loop.time()
+            if self._refilled is not None:
+                self._tokens = min(self.burst, self._tokens + (now - self._refilled) * self.rate)
+            self._refilled = now
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return
+            await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    async def _run(self):
+        while True:
+            priority, _, key, send, route = await self._take()
+            self._pending.discard(key)
+            if route is not None:
+                self._busy.add(route)
+            token = _current_route.set(route)
+            try:
+                if priority >= PRIORITY_REMINDER:
+                    await self._acquire_token()
+                await send()
+                self.sent += 1
+            except discord.HTTPException as e:
+                # DM fermés, salon supprimé... : l'envoi est abandonné
+                self.failed += 1
+                log.warning("Envoi %s abandonné : %s", key, e)
+            except Exception:
+                self.failed += 1
+                log.exception("Erreur lors de l'envoi %s", key)
+            finally:
+                _current_route.reset(token)
+                self._busy.discard(route)
+                self._changed.set()
+
+    def stats(self):
+        return {'pending': len(self._heap), 'sent': self.sent, 'failed': self.failed, 'deferred': self.deferred}
+
+    async def close(self):
+        for task in self._tasks:
+            task.cancel()
@@ -0,0 +1,57 @@
+import logging
+import time
+
+audit_log = logging.getLogger('gs.audit')
+
+
+def parse_officer_roles(raw):
+    """Lit la configuration 'guild_id:role_id|role_id,guild_id:role_id' en {guild_id: {role_id}}"""
+    roles = {}
+    for entry in raw.split(','):
+        if not entry.strip():
+            continue
+        guild_id, role_ids = entry.split(':', 1)
+        roles[int(guild_id)] = {int(role_id) for role_id in role_ids.split('|') if role_id.strip()}
+    return roles
+
+
+class PermissionService:
+    """Vérifie le rôle officier, avec un cache des décisions par (serveur, membre)"""
+
+    def __init__(self, officer_roles, default_role_ids, ttl: float = 300):
+        self.officer_roles = officer_roles  # Format: {guild_id: {role_id}}
+        self.default_role_ids = set(default_role_ids)  # Rôles des serveurs sans configuration dédiée
+        self.ttl = ttl  # Filet de sécurité si un événement de rôle n'est pas reçu
+        self._cache = {}  # Format: {(guild_id, member_id): (décision, expiration)}
+
+    def roles_for(self, guild_id):
+        return self.officer_roles.get(guild_id, self.default_role_ids)
+
+    def is_officer(self, interaction):
+        key = (interaction.guild_id, interaction.user.id)
+        now = time.monotonic()
+        cached = self._cache.get(key)
+        hit = cached is not None and cached[1] > now
+        if hit:
+            allowed = cached[0]
+        else:
+            officer_roles = self.roles_for(interaction.guild_id)
+            allowed = any(role.id in officer_roles for role in getattr(interaction.user, 'roles', ()))
+            self._cache[key] = (allowed, now + self.ttl)
+
+        command = interaction.command.qualified_name if interaction.command else None
+        audit_log.info("autorisation", extra={'fields': {
+            'guild': interaction.guild_id,
+            'user': interaction.user.id,
+            'command': command,
+            'allowed': allowed,
+            'cached': hit
+        }})
+        return allowed
+
+    def invalidate_member(self, guild_id, member_id):
+        self._cache.pop((guild_id, member_id), None)
+
+    def invalidate_guild(self, guild_id):
+        for key in [key for key in self._cache if key[0] == guild_id]:
+            del self._cache[key]
@@ -0,0 +1,114 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import re
+import time
+
+log = logging.getLogger(__name__)
+
+DURATION_RE = re.compile(r"(\d+)\s*([jhm])", re.IGNORECASE)
+DURATION_UNITS = {'j': 86400, 'h': 3600, 'm': 60}
+
+
+def parse_duration(raw):
+    """Convertit '1j', '2h30', '45m' en secondes ; None si la saisie est invalide"""
+    raw = raw.strip().lower()
+    # '2h30' : les minutes peuvent suivre les heures sans unité
+    raw = re.sub(r"(\d+h)(\d+)$", r"\1\2m", raw)
+    parts = DURATION_RE.findall(raw)
+    if not parts or DURATION_RE.sub("", raw).strip():
+        return None
+    return sum(int(value) * DURATION_UNITS[unit] for value, unit in parts)
+
+
+def parse_offsets(raw):
+    """Lit une liste de rappels '24h,2h,30m' en secondes avant la fin ; None si invalide"""
+    offsets = [parse_duration(part) for part in raw.split(',') if part.strip()]
+    if not offsets or None in offsets:
+        return None
+    return sorted(set(offsets), reverse=True)
+
+
+def format_duration(seconds):
+    """Affiche un délai en secondes sous la forme '1j2h', '30m'"""
+    parts = []
+    for unit, size in DURATION_UNITS.items():
+        value, seconds = divmod(seconds, size)
+        if value:
+            parts.append(f"{value}{unit}")
+    return "".join(parts) or "0m"
+
+
+class ReminderScheduler:
+    """Tas d'échéances de rappels, toutes sessions confondues, servi par une seule tâche
+
+    Reprogrammer ou annuler une session invalide ses anciennes entrées (suppression paresseuse).
+    """
+
+    def __init__(self, fire, clock=time.time):
+        self._fire = fire  # coroutine(clé de session, délai du rappel)
+        self._clock = clock
+        self._heap = []  # Format: [(échéance, n°, clé, délai, génération)]
+        self._counter = itertools.count()
+        self._generations = {}  # Format: {clé de session: génération courante}
+        self._plans = {}  # Format: {clé de session: (échéance, délais, délais traités) programmés}
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    def schedule(self, key, deadline, offsets, done=()):
+        """Programme les rappels d'une session ; `done` liste les délais déjà traités"""
+        generation = self._generations.get(key, 0) + 1
+        self._generations[key] = generation
+        self._plans[key] = (deadline, tuple(offsets), frozenset(done))
+        for offset in offsets:
+            if offset in done:
+                continue
+            heapq.heappush(self._heap, (deadline - offset, next(self._counter), key, offset, generation))
+        self._wakeup.set()
+
+    def reschedule(self, key, deadline, offsets, done=()):
+        """Comme `schedule`, mais sans rien ajouter au tas si ces rappels sont déjà programmés pour la session"""
+        if self._plans.get(key) == (deadline, tuple(offsets), frozenset(done)):
+            return False
+        self.schedule(key, deadline, offsets, done)
+        return True
+
+    def cancel(self, key):
+        self._plans.pop(key, None)
+        if key in self._generations:
+            self._generations[key] += 1
+
+    def __len__(self):
+        return len(self._heap)
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            if not self._heap:
+                await self._wakeup.wait()
+                continue
+            due, _, key, offset, generation = self._heap[0]
+            delay = due - self._clock()
+            if delay > 0:
+                # Réveil anticipé si une échéance plus proche est programmée entre-temps
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            heapq.heappop(self._heap)
+            if self._generations.get(key) != generation:
+                continue
+            try:
+                await self._fire(key, offset)
+            except Exception:
+                log.exception("Erreur lors de l'envoi des rappels")
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+
@@ -0,0 +1,91 @@
+import bisect
+import hashlib
+
+# Limites Discord d'un embed
+FIELD_VALUE_LIMIT = 1024
+EMBED_FIELD_LIMIT = 25
+# Place réservée au nom de chaque champ ("Participants Groupe N (x/y)")
+FIELD_NAME_RESERVE = 64
+
+
+def paginate(blocks, players_per_field, page_budget):
+    """Répartit les blocs [(user_id, texte)] en pages de champs dans les limites d'un embed
+
+    Retourne une liste de pages ; chaque page est une liste de champs, chaque champ une liste de blocs.
+    """
+    fields = []
+    current, length = [], 0
+    for user_id, text in blocks:
+        added = len(text) + (1 if current else 0)  # +1 pour le saut de ligne
+        if current and (len(current) >= players_per_field or length + added > FIELD_VALUE_LIMIT):
+            fields.append((current, length))
+            current, length, added = [], 0, len(text)
+        current.append((user_id, text))
+        length += added
+    if current:
+        fields.append((current, length))
+
+    pages = []
+    page, used = [], 0
+    for field, length in fields:
+        cost = length + FIELD_NAME_RESERVE
+        if page and (len(page) >= EMBED_FIELD_LIMIT or used + cost > page_budget):
+            pages.append(page)
+            page, used = [], 0
+        page.append(field)
+        used += cost
+    if page:
+        pages.append(page)
+    return pages
+
+
+class BoardRenderCache:
+    """Cache de rendu du tableau GS : blocs par joueur, roster trié et empreintes des pages envoyées"""
+
+    def __init__(self):
+        self._roster = []  # Format: [(nom en minuscules, user_id)], toujours trié
+        self._blocks = {}  # Format: {user_id: (signature, texte du bloc)}
+        self._pages = []  # Format: [(empreinte, embed)] par page
+        self.sent_digests = {}  # Format: {index de page: empreinte du dernier contenu envoyé}
+        self.rendered = (None, None)  # Format: (version de la session, pages rendues pour cette version)
+
+    def reset(self, players):
+        """Repart de zéro pour une nouvelle GS : roster trié reconstruit, blocs et pages envoyées oubliés"""
+        self.rebuild(players)
+        self._blocks.clear()
+        self.sent_digests.clear()
+
+    def rebuild(self, players):
+        """Reconstruit le roster trié à partir des PlayerRecord de la session (même GS, tableau inchangé)"""
+        self._roster = sorted((player.name.lower(), player.user_id) for player in players)
+
+    def add(self, user_id, name):
+        bisect.insort(self._roster, (name.lower(), user_id))
+
+    def remove(self, user_id, name):
+        key = (name.lower(), user_id)
+        i = bisect.bisect_left(self._roster, key)
+        if i < len(self._roster) and self._roster[i] == key:
+            del self._roster[i]
+        self._blocks.pop(user_id, None)
+
+    def sorted_ids(self):
+        return [user_id for _, user_id in self._roster]
+
+    def block(self, user_id, signature, build):
+        """Retourne le bloc du joueur, reconstruit seulement si ses données ont changé"""
+        cached = self._blocks.get(user_id)
+        if cached is None or cached[0] != signature:
+            cached = (signature, build(*signature))
+            self._blocks[user_id] = cached
+        return cached[1]
+
+    def embed_for(self, index, page_count, fields, build):
+        """Retourne (embed, empreinte) de la page ; l'embed n'est recréé que si son contenu change"""
+        digest = hashlib.sha1(repr((page_count, fields)).encode()).hexdigest()
+        del self._pages[page_count:]
+        while len(self._pages) <= index:
+            self._pages.append((None, None))
+        if self._pages[index][0] != digest:
+            self._pages[index] = (digest, build(fields, index, page_count))
+        return self._pages[index][1], digest
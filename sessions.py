@@ -0,0 +1,234 @@
+import asyncio
+import logging
+
+from backend import BackendError
+from engine import EventRejected, GSEngine
+from models import encode_state
+from render import BoardRenderCache
+
+log = logging.getLogger(__name__)
+
+# Tentatives d'un lot en conflit avec un autre processus avant de le garder seulement en local
+COMMIT_ATTEMPTS = 5
+
+
+class ChannelSession:
+    """GS en cours dans un salon : état des joueurs, cache de rendu du tableau
+
+    L'état n'est modifié que par l'acteur de la session : les mutations soumises avec `apply` sont
+    appliquées dans l'ordre d'arrivée, par lots, sans `await` au milieu d'un lot. Le rendu ne voit
+    donc jamais un état à moitié modifié, et `version` change une fois par lot.
+
+    Avec un backend partagé, chaque lot est validé par un commit versionné : en cas de conflit, l'acteur
+    recharge l'état écrit par l'autre processus (mutation 'restore') et réapplique le lot. Un lot gardé
+    en local (backend injoignable, conflits répétés) est réappliqué sur chaque état rechargé jusqu'à ce
+    qu'un commit le pousse.
+    """
+
+    def __init__(self, guild_id, channel_id, state=None, record=None, observe=None, max_players=None, backend=None, origin=None):
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        # Règles de la GS ; l'état de la session est celui du moteur
+        self.engine = GSEngine(state, max_players)
+        self.state = self.engine.state
+        self.render_cache = BoardRenderCache()
+        self.render_cache.reset(self.state)
+        self._record = record  # Journalisation des mutations appliquées : callable(clé, *op)
+        self._observe = observe  # Enregistrement des lots soumis, refusés compris : callable(clé, mutations)
+        self.version = 0  # Lots de mutations appliqués
+        self.generation = 0  # GS successives dans ce salon (incrémentée par 'init' ou un 'restore' d'une autre GS)
+        self._mailbox = []  # Format: [(mutations, future)]
+        self._actor = None
+        self._backend = backend  # StateBackend partagé, ou None
+        self._origin = origin  # Identifiant de ce processus dans les notifications
+        self.backend_version = 0  # Version de l'état partagé sur laquelle repose l'état local
+        self.stale = backend is not None  # L'état partagé a peut-être changé : recharger avant le prochain lot
+        self._unpushed = []  # Mutations gardées en local, absentes de l'état partagé
+
+    @property
+    def key(self):
+        return (self.guild_id, self.channel_id)
+
+    async def apply(self, op):
+        """Soumet une mutation (vocabulaire du journal) et retourne son résultat, ou None si elle a été rejetée"""
+        (result,) = await self.apply_many([op])
+        return result
+
+    async def refresh(self):
+        """Recharge l'état partagé s'il a changé dans un autre processus"""
+        await self.apply_many([])
+
+    def mark_stale(self, version):
+        """Notification d'un commit : l'état local est périmé si la version partagée est plus récente"""
+        if version > self.backend_version:
+            self.stale = True
+
+    async def apply_many(self, ops):
+        """Soumet des mutations appliquées d'un bloc, sans autre mutation intercalée ; retourne leurs résultats"""
+        if self._observe is not None and ops:
+            self._observe(self.key, ops)
+        future = asyncio.get_running_loop().create_future()
+        self._mailbox.append((ops, future))
+        if self._actor is None or self._actor.done():
+            self._actor = asyncio.create_task(self._run())
+        return await future
+
+    async def _run(self):
+        # Tout ce qui a été soumis avant que l'acteur ne s'exécute forme un seul lot
+        while self._mailbox:
+            batch, self._mailbox = self._mailbox, []
+            try:
+                if self._backend is None:
+                    results = [[self._apply(op) for op in ops] for ops, _ in batch]
+                else:
+                    results = await self._commit([ops for ops, _ in batch])
+            except Exception as e:
+                # L'acteur continue avec les lots suivants ; les appelants de ce lot reçoivent l'erreur
+                log.exception("Erreur lors de l'application d'un lot pour %s", self.key)
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+            else:
+                for (_, future), result in zip(batch, results):
+                    if not future.done():
+                        future.set_result(result)
+            # Même après une erreur : une partie du lot a pu être appliquée
+            self.version += 1
+            await asyncio.sleep(0)
+
+    async def _commit(self, batch):
+        """Applique le lot puis l'écrit dans le backend partagé, en le réappliquant sur l'état rechargé en cas de conflit"""
+        results = None
+        applied = []  # Mutations appliquées par la dernière tentative, journalisées une fois le lot gardé
+        try:
+            for _ in range(COMMIT_ATTEMPTS):
+                if self.stale:
+                    await self._pull()
+                applied = []
+                results = [[self._apply(op, applied) for op in ops] for ops in batch]
+                if not any(batch) and not self._unpushed:
+                    break
+                version = await self._backend.commit(self.key, self.backend_version, encode_state(self.state), self._origin)
+                if version is not None:
+                    self.backend_version = version
+                    self._unpushed = []
+                    break
+                self.stale = True
+            else:
+                log.warning("Lot gardé en local après %d conflits pour %s", COMMIT_ATTEMPTS, self.key)
+                self._keep_local(applied)
+        except BackendError:
+            # Backend injoignable : le lot reste local et sera poussé avec le prochain commit réussi
+            log.exception("Backend partagé indisponible pour %s", self.key)
+            self.stale = True
+            if results is None:
+                results = [[self._apply(op, applied) for op in ops] for ops in batch]
+            self._keep_local(applied)
+        # Les tentatives en conflit ont été remplacées par l'état rechargé ('restore', déjà journalisé) :
+        # seule la tentative gardée est journalisée, une archive n'est donc écrite qu'une fois
+        if self._record is not None:
+            for op in applied:
+                self._record(self.key, *op)
+        return results
+
+    def _keep_local(self, applied):
+        # 'archive' est déjà dans l'historique local et ne change pas l'état : inutile de le réappliquer
+        self._unpushed.extend(op for op in applied if op[0] != 'archive')
+
+    async def _pull(self):
+        version, state = await self._backend.load(self.key)
+        if state is not None and version > self.backend_version:
+            self._apply(('restore', state))
+            self.backend_version = version
+            # Les mutations gardées en local ne sont pas dans l'état rechargé : les réappliquer par-dessus
+            kept, self._unpushed = self._unpushed, []
+            for op in kept:
+                self._apply(op, self._unpushed)
+            if self._unpushed:
+                log.info("%d mutation(s) locale(s) réappliquée(s) sur l'état rechargé pour %s", len(self._unpushed), self.key)
+            if self._record is not None:
+                for op in self._unpushed:
+                    self._record(self.key, *op)
+        self.stale = False
+
+    def _apply(self, op, applied=None):
+        """Applique une mutation validée par le moteur ; journalisée tout de suite, ou ajoutée à `applied`"""
+        name = op[0]
+        # Un état rechargé avec d'autres pages de tableau est celui d'une autre GS
+        pages = list(self.state.message_ids) if name == 'restore' else None
+        try:
+            result = self.engine.apply(op)
+        except EventRejected as e:
+            # Par exemple un joueur retiré par une mutation plus ancienne du même lot
+            log.debug("Mutation refusée pour %s : %r (%s)", self.key, op, e)
+            return None
+        if name == 'init' or (name == 'restore' and self.state.message_ids != pages):
+            # Nouvelle GS : le tableau en cours d'envoi ne lui appartient pas
+            self.generation += 1
+            self.render_cache.reset(self.state)
+        elif name == 'restore':
+            # Même GS modifiée ailleurs : les pages déjà envoyées restent valables pour les éditions différentielles
+            self.render_cache.rebuild(self.state)
+        elif name == 'add_player' and result:
+            self.render_cache.add(op[1], op[2])
+        elif name == 'remove_player' and result is not None:
+            self.render_cache.remove(op[1], result.name)
+        if applied is not None:
+            applied.append(op)
+        elif self._record is not None:
+            self._record(self.key, *op)
+        return result
+
+
+class SessionRegistry:
+    """Sessions GS indexées par (guild_id, channel_id)"""
+
+    def __init__(self, record=None, observe=None, max_players=None, backend=None, origin=None):
+        # Transmis à chaque session : journal des mutations, enregistreur des lots, taille maximale du roster,
+        # backend partagé et identifiant de ce processus
+        self._record = record
+        self._observe = observe
+        self.max_players = max_players
+        self._backend = backend
+        self.origin = origin
+        self._sessions = {}  # Format: {(guild_id, channel_id): ChannelSession}
+
+    def get(self, guild_id, channel_id):
+        return self._sessions.get((guild_id, channel_id))
+
+    def get_or_create(self, guild_id, channel_id):
+        session = self._sessions.get((guild_id, channel_id))
+        if session is None:
+            session = self._create(guild_id, channel_id)
+            self._sessions[session.key] = session
+        return session
+
+    def restore(self, states):
+        """Recrée les sessions à partir des états chargés depuis le journal"""
+        for (guild_id, channel_id), state in states.items():
+            self._sessions[(guild_id, channel_id)] = self._create(guild_id, channel_id, state)
+
+    def _create(self, guild_id, channel_id, state=None):
+        return ChannelSession(
+            guild_id, channel_id, state, self._record, self._observe, self.max_players, self._backend, self.origin
+        )
+
+    def notify(self, key, version, origin):
+        """Notification d'un commit dans le backend ; retourne la session concernée si elle vient d'ailleurs"""
+        if origin == self.origin:
+            return None
+        session = self.get_or_create(*key)
+        session.mark_stale(version)
+        return session
+
+    def mark_all_stale(self):
+        """Notifications peut-être perdues (abonnement rétabli) : toutes les sessions sont à recharger"""
+        for session in self._sessions.values():
+            session.stale = True
+        return list(self._sessions.values())
+
+    def __iter__(self):
+        return iter(self._sessions.values())
+
+    def __len__(self):
+        return len(self._sessions)
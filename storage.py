@@ -0,0 +1,169 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+
+import history
+from engine import apply_op
+from models import GSSession, decode_state, encode_state
+
+log = logging.getLogger(__name__)
+
+
+class GSStore:
+    """Persistance des sessions GS : journal de mutations + instantanés compactés (SQLite en mode WAL)"""
+
+    def __init__(self, path, flush_interval: float = 1.0, snapshot_every: int = 500):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.snapshot_every = snapshot_every
+        self._conn = None
+        self._states = {}  # Copie des états tels qu'écrits sur disque, par (guild_id, channel_id)
+        self._dirty = set()  # Sessions modifiées depuis le dernier instantané
+        self._journal_len = 0
+        self._buffer = []
+        self._wakeup = asyncio.Event()
+        self._task = None
+        # Une écriture annulée côté asyncio peut encore tourner dans son thread
+        self._write_lock = threading.Lock()
+        # Un seul flush à la fois, et dans l'ordre : un lot plus récent n'est jamais écrit avant un lot plus ancien
+        self._flush_lock = asyncio.Lock()
+        self._writing = None  # Écriture du dernier lot (future du thread), encore en cours ou terminée
+
+    def _connect(self):
+        # Une seule écriture à la fois, mais pas toujours depuis le même thread
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS journal ("
+            "seq INTEGER PRIMARY KEY AUTOINCREMENT, guild_id INTEGER NOT NULL, channel_id INTEGER NOT NULL, op TEXT NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS snapshot ("
+            "guild_id INTEGER NOT NULL, channel_id INTEGER NOT NULL, seq INTEGER NOT NULL, state TEXT NOT NULL, "
+            "PRIMARY KEY (guild_id, channel_id))"
+        )
+        history.create_tables(self._conn)
+        self._conn.commit()
+
+    def load(self):
+        """Restaure les sessions : derniers instantanés puis rejeu du journal"""
+        self._connect()
+        snapshot_seqs = {}
+        for guild_id, channel_id, seq, raw in self._conn.execute("SELECT guild_id, channel_id, seq, state FROM snapshot"):
+            self._states[(guild_id, channel_id)] = decode_state(raw)
+            snapshot_seqs[(guild_id, channel_id)] = seq
+        ops = self._conn.execute("SELECT seq, guild_id, channel_id, op FROM journal ORDER BY seq").fetchall()
+        for seq, guild_id, channel_id, raw in ops:
+            key = (guild_id, channel_id)
+            if seq > snapshot_seqs.get(key, 0):
+                apply_op(self._states.setdefault(key, GSSession()), json.loads(raw))
+                self._dirty.add(key)
+        self._journal_len = len(ops)
+        return {key: decode_state(encode_state(state)) for key, state in self._states.items()}
+
+    def record(self, key, *op):
+        """Ajoute une mutation de la session au prochain lot, sans bloquer l'interaction"""
+        self._buffer.append((key, op))
+        self._wakeup.set()
+
+    def start(self):
+        self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            await self._wakeup.wait()
+            # Laisser les mutations s'accumuler pour les écrire en un seul lot
+            await asyncio.sleep(self.flush_interval)
+            self._wakeup.clear()
+            try:
+                await self.flush()
+            except Exception:
+                log.exception("Erreur lors de l'écriture du journal GS")
+
+    async def flush(self):
+        """Écrit les mutations en attente, après l'écriture du lot précédent"""
+        async with self._flush_lock:
+            await self._wait_write()
+            if not self._buffer:
+                return
+            batch, self._buffer = self._buffer, []
+            self._writing = asyncio.ensure_future(asyncio.to_thread(self._write, batch))
+            # Si l'appelant est annulé, l'écriture continue et le prochain flush l'attend
+            await asyncio.shield(self._writing)
+
+    async def _wait_write(self):
+        """Attend la fin de l'écriture en cours (lancée par un flush éventuellement annulé)"""
+        if self._writing is not None and not self._writing.done():
+            await asyncio.wait([self._writing])
+
+    def _write(self, batch):
+        with self._write_lock:
+            self._write_batch(batch)
+
+    def _write_batch(self, batch):
+        with self._conn:
+            self._conn.executemany(
+                "INSERT INTO journal (guild_id, channel_id, op) VALUES (?, ?, ?)",
+                [(guild_id, channel_id, json.dumps(op)) for (guild_id, channel_id), op in batch]
+            )
+            for key, op in batch:
+                state = self._states.setdefault(key, GSSession())
+                if op[0] == 'archive':
+                    # L'état sur disque à ce point du lot est exactement celui de la GS terminée
+                    history.archive_war(self._conn, key, state, op[1])
+                apply_op(state, op)
+                self._dirty.add(key)
+        self._journal_len += len(batch)
+        if self._journal_len >= self.snapshot_every:
+            self._compact()
+
+    def _compact(self):
+        """Remplace le journal par un instantané des sessions modifiées"""
+        if not self._journal_len:
+            return
+        (seq,) = self._conn.execute("SELECT MAX(seq) FROM journal").fetchone()
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO snapshot (guild_id, channel_id, seq, state) VALUES (?, ?, ?, ?)",
+                [(guild_id, channel_id, seq, encode_state(self._states[(guild_id, channel_id)])) for guild_id, channel_id in self._dirty]
+            )
+            self._conn.execute("DELETE FROM journal WHERE seq <= ?", (seq,))
+        self._dirty.clear()
+        self._journal_len = 0
+
+    async def recent_wars(self, guild_id, limit=10):
+        return await self._read_flushed(history.recent_wars, guild_id, limit)
+
+    async def player_stats(self, guild_id, user_id):
+        return await self._read_flushed(history.player_stats, guild_id, user_id)
+
+    async def last_roster(self, guild_id, channel_id):
+        return await self._read_flushed(history.last_roster, guild_id, channel_id)
+
+    async def _read_flushed(self, query, *args):
+        """Exécute une requête d'historique une fois les mutations en attente écrites (flush sérialisé)"""
+        await self.flush()
+        return await asyncio.to_thread(self._read, query, *args)
+
+    def _read(self, query, *args):
+        with self._write_lock:
+            return query(self._conn, *args)
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        # L'annulation n'arrête pas une écriture déjà lancée dans son thread : elle doit finir avant
+        # le dernier flush et le compactage, sinon son lot tomberait sur une connexion fermée
+        await self._wait_write()
+        await self.flush()
+        if self._conn is not None:
+            await asyncio.to_thread(self._close_connection)
+
+    def _close_connection(self):
+        with self._write_lock:
+            self._compact()
+            self._conn.close()
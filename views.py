@@ -0,0 +1,30 @@
+import discord
+
+from models import ACTIONS, TARGETS
+
+
+class BoardView(discord.ui.View):
+    """Menus persistants attachés au tableau : un joueur choisit sa cible sans taper de commande
+
+    Les custom_id sont fixes et la vue n'expire pas : enregistrée avec `bot.add_view` au démarrage,
+    elle reste active sur les tableaux envoyés avant un redémarrage.
+    """
+
+    def __init__(self, submit, labels):
+        super().__init__(timeout=None)
+        self._submit = submit  # coroutine(interaction, action, cible)
+        for row, action in enumerate(ACTIONS):
+            emoji, label = labels[action]
+            select = discord.ui.Select(
+                custom_id=f"gs_board:{action}",
+                placeholder=f"{emoji} {label} : choisir une cible",
+                options=[discord.SelectOption(label=str(target), value=str(target)) for target in TARGETS],
+                row=row
+            )
+            select.callback = self._callback(action, select)
+            self.add_item(select)
+
+    def _callback(self, action, select):
+        async def callback(interaction):
+            await self._submit(interaction, action, int(select.values[0]))
+        return callback